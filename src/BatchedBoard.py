@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Optional, cast
+
+import numpy as np
+
+from BoardHistory import BoardHistory, LatestHistory, STATE_DTYPE
+from DiseaseBoard import (DiseaseBoard, BoardSize, BoardState, Seed, STATE, COUNTER_CAPACITY, DATE_DTYPE, ENGINE_NUMPY,
+                          read_checkpoint)
+
+
+class BatchedBoard(DiseaseBoard):
+    """
+    Replicas of a DiseaseBoard with the same parameters, stored as one (replica, length, width) board and advanced
+    together by the vectorized engine
+
+    The counters hold one value per replica : deceased_nbr gives a numpy array indexed by replica, infected_data...
+    give (round, replica) arrays.
+    By default, only the latest round is kept in history. The replicas are always advanced by the numpy engine, and
+    their checkpoints are loaded back by the load_checkpoint of this module.
+    """
+
+    def __init__(self, replica_nbr: int, size: BoardSize, cluster_nbr: int, history: Optional[BoardHistory] = None,
+                 seed: Seed = None) -> None:
+        self._replica_nbr: int = replica_nbr
+
+        super(BatchedBoard, self).__init__(size, cluster_nbr, ENGINE_NUMPY,
+                                           history if history is not None else LatestHistory(), seed)
+
+    @property
+    def replica_nbr(self) -> int:
+        return self._replica_nbr
+
+    @DiseaseBoard.engine.setter  # type: ignore
+    def engine(self, engine) -> None:
+        if engine != ENGINE_NUMPY:
+            raise ValueError("Replicas are only advanced by the %r engine, got %r" % (ENGINE_NUMPY, engine))
+        self._engine = engine
+
+    @property
+    def counters(self) -> np.ndarray:
+        """
+        :return: (replica, round, state) counters, as used by EnsembleResult
+        """
+        return self._counter[:self._current_round + 1].transpose(2, 0, 1)
+
+    def init_board(self) -> None:
+        shape = (self._replica_nbr, self._length, self._width)
+
+        # Creation de la population immunisée, puis des clusters de chaque réplique, sans remise dans une réplique
+        rate = self._immunity_rate if self._immunity_map is None else self._immunity_map
+        etat0 = np.where(self._rng.random(shape) < rate, STATE["IMMUNE"], STATE["SUSCEPTIBLE"])
+        etat0 = etat0.astype(STATE_DTYPE)
+
+        clusters = [self._initial_clusters() for _ in range(self._replica_nbr)]
+        replicas = np.repeat(np.arange(self._replica_nbr), [x.size for x, _ in clusters])
+        x0 = np.concatenate([x for x, _ in clusters])
+        y0 = np.concatenate([y for _, y in clusters])
+        etat0[replicas, x0, y0] = STATE["INFECTED"]
+
+        self._contamination_dates = np.zeros(shape, dtype=DATE_DTYPE)
+        self._contamination_dates[replicas, x0, y0] = -1
+        self._date_origin = 0
+        self._counter[0, STATE["INFECTED"]] = np.count_nonzero(etat0 == STATE["INFECTED"], axis=(1, 2))
+
+        self._board = BoardState(etat0)
+        self._state_db.append(0, etat0)
+
+    def reset(self, seed: Seed = None) -> None:
+        if seed is not None:
+            self._seed = seed
+            self._rng = np.random.default_rng(seed)
+
+        # Une ligne par tour, une colonne par état, une valeur par réplique
+        self._counter = np.zeros((COUNTER_CAPACITY, len(STATE), self._replica_nbr), dtype=np.int64)
+
+        self._state_db.clear()
+        self.init_board()
+
+        self._current_round = 0
+
+    def _checkpoint_metadata(self) -> Dict[str, Any]:
+        metadata = super(BatchedBoard, self)._checkpoint_metadata()
+        metadata["replica_nbr"] = self._replica_nbr
+        return metadata
+
+    def fork(self, history: Optional[BoardHistory] = None) -> "BatchedBoard":
+        """
+        Copy the replicas with their full simulation state, as DiseaseBoard.fork
+
+        :param history: round history of the copy (None to keep only the latest round)
+        :return: copy of the replicas
+        """
+        return cast(BatchedBoard, super(BatchedBoard, self).fork(history if history is not None else LatestHistory()))
+
+    def next_round(self) -> BoardState:
+        """
+        Create next round state of every replica
+
+        :return: (replica, length, width) next round state, updated in place as in DiseaseBoard
+        """
+        current_state: BoardState = self._board
+
+        # social distancing effect
+        if self._current_round == self._socialDistancingDelay:
+            self._contagion_rate = self._socialDistancingContagionRate
+
+        today = self._today()
+        state, contagious = self._transitions(current_state, today - self._contamination_dates)
+
+        # Contamination des voisins, dans toutes les répliques à la fois
+        if contagious.any():
+            exposed, contamination_proba = self._contamination_proba(contagious, current_state == STATE["SUSCEPTIBLE"])
+            newly_infected = np.zeros_like(exposed)
+            newly_infected[exposed] = self._rng.random(contamination_proba.size) < contamination_proba
+            state[newly_infected] = STATE["INFECTED"]
+            self._contamination_dates[newly_infected] = today
+
+        # Compteurs de chaque réplique : une seule réduction sur les cases qui ont changé
+        replicas, x, y = np.nonzero(state != current_state)
+        state_nbr = len(STATE)
+        left = np.bincount(replicas * state_nbr + current_state[replicas, x, y],
+                           minlength=self._replica_nbr * state_nbr).reshape(self._replica_nbr, state_nbr)
+        entered = np.bincount(replicas * state_nbr + state[replicas, x, y],
+                              minlength=self._replica_nbr * state_nbr).reshape(self._replica_nbr, state_nbr)
+        delta = entered - left
+        # Susceptible people are not counted, as in DiseaseBoard
+        delta[:, STATE["SUSCEPTIBLE"]] = 0
+        self._grow_counter()
+        self._counter[self._current_round + 1] = self._counter[self._current_round] + delta.T
+
+        current_state[...] = state
+        self._current_round += 1
+        self._state_db.append(self._current_round, self._board)
+
+        return self._board
+
+
+def load_checkpoint(file: str, history: Optional[BoardHistory] = None) -> BatchedBoard:
+    """
+    Load replicas saved by BatchedBoard.save_checkpoint : the following rounds are the same as if the run had not
+    been stopped
+
+    :param file: checkpoint file path
+    :param history: round history (None to keep only the latest round), that starts at the checkpoint round
+    :return: replicas, at the checkpoint round
+    """
+    metadata, arrays = read_checkpoint(file)
+    if metadata.get("replica_nbr") is None:
+        raise ValueError("%s is a checkpoint of a single board, that DiseaseBoard.load_checkpoint loads" % file)
+
+    parameters = metadata["parameters"]
+    board = BatchedBoard(metadata["replica_nbr"], (metadata["length"], metadata["width"]), parameters["cluster_nbr"],
+                         history, metadata["seed"])
+    board._load_checkpoint(metadata, arrays)
+    return board
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import struct
+import zlib
+from typing import Union
+
+import numpy as np
+
+# Codecs des plateaux : plans de bits, plages de cases identiques, ou plans de bits compressés par zlib
+CODEC_BITPLANES = "bitplanes"
+CODEC_RLE = "rle"
+CODEC_ZLIB = "zlib"
+CODECS = (CODEC_BITPLANES, CODEC_RLE, CODEC_ZLIB)
+
+# Les états tiennent sur 3 bits, et sont décodés sur un octet comme STATE_DTYPE
+STATE_BITS = 3
+BOARD_DTYPE = np.uint8
+
+# En-tête : identifiant du format, codec, nombre de dimensions, puis chaque dimension sur 8 octets
+MAGIC = b"SPRB"
+HEADER = struct.Struct("<4sBB")
+DIMENSION = struct.Struct("<q")
+
+# Contenu d'un instantané, lu sans copie depuis l'instantané
+Payload = Union[bytes, memoryview]
+
+# Niveau de compression zlib : les plans de bits sont déjà compacts, un niveau rapide suffit
+ZLIB_LEVEL = 1
+
+
+def _encode_bitplanes(flat: np.ndarray) -> bytes:
+    """
+    :param flat: flat board
+    :return: the STATE_BITS bit planes of the board, one after the other, 8 cells per byte
+    """
+    return b"".join(np.packbits((flat >> bit) & 1).tobytes() for bit in range(STATE_BITS))
+
+
+def _decode_bitplanes(payload: Payload, size: int) -> np.ndarray:
+    """
+    :param payload: bit planes written by _encode_bitplanes
+    :param size: number of cells
+    :return: flat board
+    """
+    planes = np.frombuffer(payload, dtype=np.uint8).reshape(STATE_BITS, -1)
+    flat = np.zeros(size, dtype=BOARD_DTYPE)
+    for bit, plane in enumerate(planes):
+        flat |= np.unpackbits(plane, count=size) << bit
+    return flat
+
+
+def _encode_rle(flat: np.ndarray) -> bytes:
+    """
+    :param flat: flat board
+    :return: number of runs, then the state of every run (1 byte) and its length (4 bytes)
+    """
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1)) if flat.size else np.empty(0, int)
+    values = flat[starts]
+    lengths = np.diff(np.append(starts, flat.size))
+
+    # Une plage plus longue que 2^32 - 1 cases est coupée en plusieurs plages du même état
+    run_max = int(np.iinfo(np.uint32).max)
+    if lengths.size and lengths.max() > run_max:
+        pieces = -(-lengths // run_max)
+        values = np.repeat(values, pieces)
+        split = np.full(pieces.sum(), run_max, dtype=np.int64)
+        split[np.cumsum(pieces) - 1] = lengths - run_max * (pieces - 1)
+        lengths = split
+
+    return DIMENSION.pack(values.size) + values.tobytes() + lengths.astype("<u4").tobytes()
+
+
+def _decode_rle(payload: Payload) -> np.ndarray:
+    """
+    :param payload: runs written by _encode_rle
+    :return: flat board
+    """
+    (run_nbr,) = DIMENSION.unpack_from(payload)
+    values = np.frombuffer(payload, dtype=BOARD_DTYPE, count=run_nbr, offset=DIMENSION.size)
+    lengths = np.frombuffer(payload, dtype="<u4", count=run_nbr, offset=DIMENSION.size + run_nbr)
+    return np.repeat(values, lengths)
+
+
+def encode_board(board: np.ndarray, codec: str = CODEC_ZLIB) -> bytes:
+    """
+    Encode a board, or a stack of boards, into a compact snapshot
+
+    - bitplanes : 3 bits per cell, whatever the board
+    - rle : one run per group of consecutive identical cells, for boards made of large uniform regions
+    - zlib : bit planes compressed by zlib, the smallest on most boards
+
+    :param board: board of states (values below 2^STATE_BITS)
+    :param codec: one of CODECS
+    :return: snapshot, that decode_board reads back
+    """
+    if codec not in CODECS:
+        raise ValueError("Unknown codec %r, expected one of %s" % (codec, ", ".join(CODECS)))
+
+    flat = np.ascontiguousarray(board, dtype=BOARD_DTYPE).ravel()
+    if codec == CODEC_RLE:
+        payload = _encode_rle(flat)
+    else:
+        payload = _encode_bitplanes(flat)
+        if codec == CODEC_ZLIB:
+            payload = zlib.compress(payload, ZLIB_LEVEL)
+
+    header = HEADER.pack(MAGIC, CODECS.index(codec), board.ndim)
+    return header + b"".join(DIMENSION.pack(dimension) for dimension in board.shape) + payload
+
+
+def decode_board(snapshot: bytes) -> np.ndarray:
+    """
+    :param snapshot: snapshot written by encode_board
+    :return: board, as a new writable uint8 array
+    """
+    magic, codec_id, ndim = HEADER.unpack_from(snapshot)
+    if magic != MAGIC or codec_id >= len(CODECS):
+        raise ValueError("Not a board snapshot")
+
+    offset = HEADER.size + ndim * DIMENSION.size
+    shape = tuple(DIMENSION.unpack_from(snapshot, HEADER.size + k * DIMENSION.size)[0] for k in range(ndim))
+    size = int(np.prod(shape))
+    payload = memoryview(snapshot)[offset:]
+
+    codec = CODECS[codec_id]
+    if codec == CODEC_RLE:
+        flat = _decode_rle(payload)
+    else:
+        flat = _decode_bitplanes(zlib.decompress(payload) if codec == CODEC_ZLIB else payload, size)
+
+    return flat.reshape(shape)
+
+
+def save_board(file: str, board: np.ndarray, codec: str = CODEC_ZLIB) -> None:
+    """
+    :param file: snapshot file path
+    :param board: board to save
+    :param codec: one of CODECS
+    """
+    with open(file, "wb") as f:
+        f.write(encode_board(board, codec))
+
+
+def load_board(file: str) -> np.ndarray:
+    """
+    :param file: snapshot file written by save_board
+    :return: board
+    """
+    with open(file, "rb") as f:
+        return decode_board(f.read())
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from BoardCodec import CODECS, CODEC_ZLIB, decode_board, encode_board
+
+# Les états tiennent sur un octet
+STATE_DTYPE = np.uint8
+
+# Plateau conservé : copie uint8, ou instantané encodé par BoardCodec
+Frame = Union[np.ndarray, bytes]
+
+
+class BoardHistory(ABC):
+    """
+    Base class of the round histories : boards are appended round after round, and read back with board_at
+
+    The full boards kept by a history are copies, or snapshots encoded by the codec of the history (None for copies),
+    smaller but decoded when read. Copies are encoded anyway when the history is pickled to be sent to another
+    process.
+    """
+
+    def __init__(self, codec: Optional[str] = None) -> None:
+        if codec is not None and codec not in CODECS:
+            raise ValueError("Unknown codec %r, expected one of %s" % (codec, ", ".join(CODECS)))
+
+        self._codec: Optional[str] = codec
+
+    @property
+    def codec(self) -> Optional[str]:
+        return self._codec
+
+    def _store(self, board: np.ndarray) -> Frame:
+        """
+        :param board: board to keep
+        :return: copy of the board, or its snapshot
+        """
+        if self._codec is None:
+            return board.astype(STATE_DTYPE, copy=True)
+        return encode_board(board, self._codec)
+
+    @staticmethod
+    def _load(frame: Frame) -> np.ndarray:
+        """
+        :param frame: board kept by _store
+        :return: board, that the caller may modify
+        """
+        if isinstance(frame, bytes):
+            return decode_board(frame)
+        return frame.copy()
+
+    @staticmethod
+    def _frame_nbytes(frame: Frame) -> int:
+        return len(frame) if isinstance(frame, bytes) else frame.nbytes
+
+    @staticmethod
+    def _pickled(frame: Frame) -> bytes:
+        return frame if isinstance(frame, bytes) else encode_board(frame, CODEC_ZLIB)
+
+    def _unpickled(self, frame: bytes) -> Frame:
+        return frame if self._codec is not None else decode_board(frame)
+
+    @property
+    @abstractmethod
+    def rounds(self) -> List[int]:
+        """
+        :return: rounds whose board can be read back, oldest first
+        """
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """
+        :return: memory used by the kept boards and changes, in bytes
+        """
+
+    def __len__(self) -> int:
+        return len(self.rounds)
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Forget every kept round
+        """
+
+    @abstractmethod
+    def append(self, round_nbr: int, board: np.ndarray,
+               changes: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> None:
+        """
+        :param round_nbr: round of the board
+        :param board: board state
+        :param changes: flat index of the cells changed since the previous round and their new states, if known
+        """
+
+    @abstractmethod
+    def board_at(self, round_nbr: int) -> np.ndarray:
+        """
+        :param round_nbr: round of the board
+        :return: board state, raises KeyError if the round is not kept
+        """
+
+
+class FrameHistory(BoardHistory):
+    """
+    Round history storing a full uint8 copy of the kept boards
+
+    The retention policy is given by two parameters :
+    - max_size : number of boards kept, oldest dropped first (-1 for no limit, 1 to keep only the latest)
+    - step : only the rounds that are a multiple of step are kept
+
+    Every kept round costs a copy of the whole board : LatestHistory keeps the latest round without copying it.
+    """
+
+    def __init__(self, max_size: int = -1, step: int = 1, codec: Optional[str] = None) -> None:
+        super(FrameHistory, self).__init__(codec)
+        if max_size == 0 or max_size < -1:
+            raise ValueError("max_size must be -1 or a positive number, got %d" % max_size)
+        if step < 1:
+            raise ValueError("step must be a positive number, got %d" % step)
+
+        self._max_size: int = max_size
+        self._step: int = step
+        self._frames: Deque[Tuple[int, Frame]] = deque(maxlen=max_size if max_size > 0 else None)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    @property
+    def rounds(self) -> List[int]:
+        return [round_nbr for round_nbr, _ in self._frames]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self._frame_nbytes(frame) for _, frame in self._frames)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def clear(self) -> None:
+        self._frames.clear()
+
+    def append(self, round_nbr: int, board: np.ndarray,
+               changes: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> None:
+        """
+        Store the board of a round, if the retention policy keeps it
+
+        :param round_nbr: round of the board
+        :param board: board state, copied or encoded
+        :param changes: unused, full boards are stored
+        """
+        if round_nbr % self._step == 0:
+            self._frames.append((round_nbr, self._store(board)))
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_frames"] = [(round_nbr, self._pickled(frame)) for round_nbr, frame in self._frames]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._frames = deque([(round_nbr, self._unpickled(frame)) for round_nbr, frame in state["_frames"]],
+                             maxlen=self._max_size if self._max_size > 0 else None)
+
+    def board_at(self, round_nbr: int) -> np.ndarray:
+        """
+        Get the stored board of a round
+
+        :param round_nbr: round of the board
+        :return: board state, a copy that the caller may modify
+        """
+        for stored_round, frame in reversed(self._frames):
+            if stored_round == round_nbr:
+                return self._load(frame)
+
+        raise KeyError("Round %d is not kept in history" % round_nbr)
+
+
+class LatestHistory(BoardHistory):
+    """
+    Round history keeping only the latest round, without any copy : the board itself is referenced, as it is updated
+    in place by DiseaseBoard.next_round
+
+    Use it when the past rounds are not needed, so that a round costs nothing more than its changes.
+    """
+
+    def __init__(self) -> None:
+        super(LatestHistory, self).__init__()
+        self._round: int = -1
+        self._board: Optional[np.ndarray] = None
+
+    @property
+    def rounds(self) -> List[int]:
+        return [] if self._board is None else [self._round]
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+    def clear(self) -> None:
+        self._round = -1
+        self._board = None
+
+    def append(self, round_nbr: int, board: np.ndarray,
+               changes: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> None:
+        """
+        Reference the board of the latest round
+
+        :param round_nbr: round of the board
+        :param board: board state, not copied
+        :param changes: unused
+        """
+        self._round = round_nbr
+        self._board = board
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_board"] = None if self._board is None else self._pickled(self._board)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._board = None if state["_board"] is None else decode_board(state["_board"])
+
+    def board_at(self, round_nbr: int) -> np.ndarray:
+        """
+        Get a copy of the latest board
+
+        :param round_nbr: round of the board, the latest one
+        :return: board state
+        """
+        if self._board is None or round_nbr != self._round:
+            raise KeyError("Round %d is not kept in history" % round_nbr)
+
+        return self._board.astype(STATE_DTYPE, copy=True)
+
+
+class DeltaHistory(BoardHistory):
+    """
+    Round history storing the initial board, then for every round the cells that changed (flat index, new state)
+
+    A full copy of the board (keyframe) is also stored every keyframe_interval rounds (-1 for none but the initial
+    board), so that board_at only replays the changes since the closest keyframe. Without keyframes, memory grows
+    with the number of state transitions, not with the board area.
+    """
+
+    def __init__(self, keyframe_interval: int = 100, codec: Optional[str] = None) -> None:
+        super(DeltaHistory, self).__init__(codec)
+        if keyframe_interval == 0 or keyframe_interval < -1:
+            raise ValueError("keyframe_interval must be -1 or a positive number, got %d" % keyframe_interval)
+
+        self._keyframe_interval: int = keyframe_interval
+        self._first_round: int = 0
+        self._keyframes: Dict[int, Frame] = {}
+        self._changes: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._last: Optional[np.ndarray] = None
+
+        # Dernier plateau reconstruit, pour avancer tour par tour sans repartir d'une keyframe
+        self._cursor: Optional[Tuple[int, np.ndarray]] = None
+
+    @property
+    def keyframe_interval(self) -> int:
+        return self._keyframe_interval
+
+    @property
+    def rounds(self) -> List[int]:
+        if self._last is None:
+            return []
+        return list(range(self._first_round, self._first_round + len(self._changes) + 1))
+
+    @property
+    def nbytes(self) -> int:
+        keyframes = sum(self._frame_nbytes(frame) for frame in self._keyframes.values())
+        changes = sum(index.nbytes + states.nbytes for index, states in self._changes)
+        return keyframes + changes
+
+    def __len__(self) -> int:
+        return 0 if self._last is None else len(self._changes) + 1
+
+    def clear(self) -> None:
+        self._keyframes.clear()
+        self._changes.clear()
+        self._last = None
+        self._cursor = None
+
+    def append(self, round_nbr: int, board: np.ndarray,
+               changes: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> None:
+        """
+        Store the changes of a round, compared to the previous one
+
+        :param round_nbr: round of the board, following the last stored one
+        :param board: board state
+        :param changes: flat index of the changed cells and their new states, computed from board if not given
+        """
+        if self._last is None:
+            self._first_round = round_nbr
+            self._keyframes[round_nbr] = self._store(board)
+            self._last = board.astype(STATE_DTYPE, copy=True)
+            return
+
+        if round_nbr != self._first_round + len(self._changes) + 1:
+            raise ValueError("Round %d does not follow the last stored round" % round_nbr)
+
+        if changes is None:
+            index = np.flatnonzero(board != self._last)
+            states = board.ravel()[index].astype(STATE_DTYPE)
+        else:
+            index, states = changes[0], changes[1].astype(STATE_DTYPE)
+        index_dtype = np.uint32 if board.size <= np.iinfo(np.uint32).max else np.int64
+        self._changes.append((index.astype(index_dtype), states))
+        self._last.ravel()[index] = states
+
+        if self._keyframe_interval > 0 and (round_nbr - self._first_round) % self._keyframe_interval == 0:
+            self._keyframes[round_nbr] = self._store(self._last)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_keyframes"] = {round_nbr: self._pickled(frame) for round_nbr, frame in self._keyframes.items()}
+        state["_last"] = None if self._last is None else self._pickled(self._last)
+        state["_cursor"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._keyframes = {round_nbr: self._unpickled(frame) for round_nbr, frame in state["_keyframes"].items()}
+        self._last = None if state["_last"] is None else decode_board(state["_last"])
+
+    def changes_at(self, round_nbr: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the changes of a round, compared to the previous one
+
+        :param round_nbr: round of the changes
+        :return: flat index of the changed cells, new states of these cells
+        """
+        if not self._first_round < round_nbr <= self._first_round + len(self._changes):
+            raise KeyError("Round %d changes are not kept in history" % round_nbr)
+
+        return self._changes[round_nbr - self._first_round - 1]
+
+    def board_at(self, round_nbr: int) -> np.ndarray:
+        """
+        Rebuild the board of a round from the closest keyframe (or from the last rebuilt board)
+
+        :param round_nbr: round of the board
+        :return: board state
+        """
+        if self._last is None or not self._first_round <= round_nbr <= self._first_round + len(self._changes):
+            raise KeyError("Round %d is not kept in history" % round_nbr)
+
+        if round_nbr == self._first_round + len(self._changes):
+            return self._last.copy()
+
+        start = max(r for r in self._keyframes if r <= round_nbr)
+        if self._cursor is not None and start <= self._cursor[0] <= round_nbr:
+            start, board = self._cursor
+        else:
+            board = self._load(self._keyframes[start])
+
+        for index, states in self._changes[start - self._first_round:round_nbr - self._first_round]:
+            board.ravel()[index] = states
+
+        self._cursor = (round_nbr, board)
+        return board.copy()
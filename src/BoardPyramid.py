@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import List, Tuple
+
+import numpy as np
+
+from DiseaseBoard import BoardState, STATE
+
+# Taille minimale, en blocs, du niveau le plus grossier
+MIN_LEVEL_SIZE = 64
+
+
+class BoardPyramid:
+    """
+    Downsampled views of a board, for the display of boards larger than the screen
+
+    Level k splits the board into blocks of 2^k x 2^k cells and holds, for every block, the number of cells in each
+    state. Level 0 is the board itself and is not stored. The levels can be rebuilt from a board, or kept up to date
+    from the cells changed by each round.
+    """
+
+    def __init__(self, board_shape: Tuple[int, int]) -> None:
+        self._shape: Tuple[int, int] = board_shape
+
+        # Niveaux jusqu'à ce que le plus grand côté tienne dans MIN_LEVEL_SIZE blocs
+        self._levels: List[np.ndarray] = []
+        length, width = board_shape
+        while max(length, width) > MIN_LEVEL_SIZE:
+            length, width = (length + 1) // 2, (width + 1) // 2
+            self._levels.append(np.zeros((length, width, len(STATE)), dtype=np.int32))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._shape
+
+    @property
+    def level_nbr(self) -> int:
+        """
+        :return: number of levels, including the board itself
+        """
+        return len(self._levels) + 1
+
+    def rebuild(self, bs: BoardState) -> None:
+        """
+        Compute every level from a board
+
+        :param bs: board state
+        """
+        if not self._levels:
+            return
+
+        # Premier niveau : blocs 2x2 du board, complété par une valeur qui n'est pas un état
+        first = self._levels[0]
+        padded = np.full((2 * first.shape[0], 2 * first.shape[1]), np.iinfo(np.uint8).max, dtype=np.uint8)
+        padded[:bs.shape[0], :bs.shape[1]] = bs
+        for state in range(len(STATE)):
+            cells = (padded == state).view(np.uint8)
+            first[..., state] = cells[0::2, 0::2] + cells[0::2, 1::2] + cells[1::2, 0::2] + cells[1::2, 1::2]
+
+        # Niveaux suivants : somme des blocs 2x2 du niveau précédent
+        for previous, level in zip(self._levels, self._levels[1:]):
+            padded = np.zeros((2 * level.shape[0], 2 * level.shape[1], len(STATE)), dtype=np.int32)
+            padded[:previous.shape[0], :previous.shape[1]] = previous
+            level[...] = padded[0::2, 0::2] + padded[0::2, 1::2] + padded[1::2, 0::2] + padded[1::2, 1::2]
+
+    def update(self, index: np.ndarray, old_states: np.ndarray, new_states: np.ndarray) -> None:
+        """
+        Update every level with the cells changed since the last update
+
+        :param index: flat index of the changed cells, without duplicates
+        :param old_states: previous state of each cell
+        :param new_states: new state of each cell
+        """
+        x, y = np.divmod(index, self._shape[1])
+        for k, level in enumerate(self._levels, start=1):
+            block = ((x >> k) * level.shape[1] + (y >> k)) * len(STATE)
+            counts = level.reshape(-1)
+            np.subtract.at(counts, block + old_states, 1)
+            np.add.at(counts, block + new_states, 1)
+
+    def level_for(self, cell_size: float) -> int:
+        """
+        :param cell_size: displayed size of a cell, in pixels
+        :return: finest level whose blocks are at least one pixel wide
+        """
+        if cell_size >= 1:
+            return 0
+
+        return min(int(np.ceil(np.log2(1 / cell_size))), len(self._levels))
+
+    def counts(self, level: int) -> np.ndarray:
+        """
+        :param level: level, from 1 to level_nbr - 1
+        :return: (block line, block column, state) number of cells
+        """
+        return self._levels[level - 1]
+
+    def fractions(self, level: int) -> np.ndarray:
+        """
+        :param level: level, from 1 to level_nbr - 1
+        :return: (block line, block column, state) fraction of the cells of each block in each state
+        """
+        counts = self.counts(level)
+        return counts / counts.sum(axis=2, keepdims=True)
+
+    def dominant(self, level: int) -> np.ndarray:
+        """
+        :param level: level, from 1 to level_nbr - 1
+        :return: (block line, block column) most frequent state of each block
+        """
+        return np.argmax(self.counts(level), axis=2).astype(np.uint8)
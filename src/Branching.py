@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from BoardHistory import LatestHistory
+from DiseaseBoard import BoardSize, DiseaseBoard, ENGINE_FRONTIER, configured_board, set_parameter
+from Ensemble import map_tasks
+
+
+def run_branch(board: DiseaseBoard, parameters: Dict[str, Any], round_nbr: int) -> np.ndarray:
+    """
+    Set the parameters of a branch, then run it
+
+    :param board: board of the branch, forked from the trunk
+    :param parameters: DiseaseBoard parameters of the branch, by property name
+    :param round_nbr: number of rounds to simulate
+    :return: (round, state) counters of the branch, from round 0 of the trunk
+    """
+    for name, value in parameters.items():
+        set_parameter(board, name, value)
+
+    for _ in range(round_nbr):
+        board.next_round()
+
+    return board.counters.copy()
+
+
+def _run_branch(args: Tuple) -> np.ndarray:
+    return run_branch(*args)
+
+
+def run_branches(trunk: DiseaseBoard, branches: Dict[str, Dict[str, Any]], round_nbr: int,
+                 processes: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Fork branches from the current round of a board, each with its own parameters, and run them on a process pool
+
+    The rounds before the fork are only computed once, by the trunk. All the branches start with the random generator
+    state of the trunk, so that their differences only come from their parameters. The parameters of a branch take
+    effect from the fork round : for instance, a social_distancing_delay before the fork round has no effect.
+
+    :param trunk: board at the fork round, left unchanged
+    :param branches: parameters of every branch, by branch name
+    :param round_nbr: number of rounds to simulate after the fork
+    :param processes: number of worker processes (None for one per core, 1 to run in the current process)
+    :return: (round, state) counters of every branch, from round 0 of the trunk, by branch name
+    """
+    tasks = [(trunk.fork(LatestHistory()), parameters, round_nbr) for parameters in branches.values()]
+
+    return dict(zip(branches, map_tasks(_run_branch, tasks, processes)))
+
+
+def run_scenarios(size: BoardSize, cluster_nbr: int, prefix_round_nbr: int, round_nbr: int,
+                  branches: Dict[str, Dict[str, Any]], parameters: Optional[Dict[str, Any]] = None,
+                  engine: str = ENGINE_FRONTIER, seed: Optional[int] = None,
+                  processes: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Run the rounds shared by every scenario once, then fork one branch per scenario
+
+    :param size: side of a square board, or (length, width)
+    :param cluster_nbr: number of initial disease clusters
+    :param prefix_round_nbr: number of rounds shared by every scenario
+    :param round_nbr: number of rounds to simulate after the shared ones
+    :param branches: parameters of every scenario, that differ from the shared ones, by scenario name
+    :param parameters: DiseaseBoard parameters shared by every scenario, by property name
+    :param engine: simulation engine
+    :param seed: seed of the random generator
+    :param processes: number of worker processes (None for one per core, 1 to run in the current process)
+    :return: (round, state) counters of every scenario, from round 0, by scenario name
+    """
+    trunk = configured_board(size, cluster_nbr, parameters, engine, LatestHistory(), seed)
+    for _ in range(prefix_round_nbr):
+        trunk.next_round()
+
+    return run_branches(trunk, branches, round_nbr, processes)
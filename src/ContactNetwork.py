@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Voisins de Moore du demi-plan : chaque arête de la grille n'est construite qu'une fois, puis symétrisée
+HALF_MOORE_OFFSETS = [(0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+class ContactNetwork:
+    """
+    Contacts between the cells of a board, as a sparse graph in CSR form
+
+    The contacts of node i are indices[indptr[i]:indptr[i + 1]], node i being the cell of flat index i. An optional
+    weight scales the contagion rate of each contact (None for a weight of 1 on every contact).
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, weights: Optional[np.ndarray] = None) -> None:
+        if indptr.ndim != 1 or indptr.size == 0 or indptr[0] != 0 or indptr[-1] != indices.size:
+            raise ValueError("indptr must start at 0 and end at the number of contacts")
+        if weights is not None and weights.shape != indices.shape:
+            raise ValueError("weights must have one value per contact")
+
+        self._indptr: np.ndarray = indptr
+        self._indices: np.ndarray = indices
+        self._weights: Optional[np.ndarray] = weights
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self._indptr
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices
+
+    @property
+    def weights(self) -> Optional[np.ndarray]:
+        return self._weights
+
+    @property
+    def node_nbr(self) -> int:
+        return self._indptr.size - 1
+
+    @property
+    def edge_nbr(self) -> int:
+        return self._indices.size
+
+    @property
+    def nbytes(self) -> int:
+        weights = 0 if self._weights is None else self._weights.nbytes
+        return self._indptr.nbytes + self._indices.nbytes + weights
+
+    def contacts(self, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the contacts of a set of nodes, in one vectorized gather
+
+        :param nodes: index of the nodes
+        :return: index of the contacts of every node, one after the other, and their weights
+        """
+        starts = self._indptr[nodes]
+        degrees = self._indptr[nodes + 1] - starts
+
+        # Position de chaque contact dans indices : début de son noeud, plus son rang parmi les contacts du noeud
+        ends = np.cumsum(degrees)
+        positions = np.arange(ends[-1] if ends.size else 0) + np.repeat(starts - ends + degrees, degrees)
+
+        weights = np.ones(positions.size) if self._weights is None else self._weights[positions]
+        return self._indices[positions], weights
+
+
+def network_from_edges(node_nbr: int, sources: np.ndarray, targets: np.ndarray,
+                       weights: Optional[np.ndarray] = None, symmetric: bool = True) -> ContactNetwork:
+    """
+    Build a contact network from a list of edges
+
+    :param node_nbr: number of nodes
+    :param sources: first node of every edge
+    :param targets: second node of every edge
+    :param weights: weight of every edge (None for 1)
+    :param symmetric: add the reverse of every edge, for contacts that go both ways
+    :return: contact network
+    """
+    if symmetric:
+        sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources))
+        if weights is not None:
+            weights = np.concatenate((weights, weights))
+
+    order = np.argsort(sources, kind="stable")
+    index_dtype = np.int32 if node_nbr <= np.iinfo(np.int32).max else np.int64
+    indptr = np.zeros(node_nbr + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_nbr), out=indptr[1:])
+
+    return ContactNetwork(indptr, targets[order].astype(index_dtype),
+                          None if weights is None else weights[order].astype(np.float32))
+
+
+def grid_edges(length: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :param length: number of lines of the board
+    :param width: number of columns of the board
+    :return: the two nodes of every edge between Moore neighbours, each edge once
+    """
+    x, y = np.divmod(np.arange(length * width), width)
+    sources, targets = [], []
+    for dx, dy in HALF_MOORE_OFFSETS:
+        inside = (x + dx < length) & (y + dy >= 0) & (y + dy < width)
+        node = np.flatnonzero(inside)
+        sources.append(node)
+        targets.append(node + dx * width + dy)
+
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def grid_network(length: int, width: int) -> ContactNetwork:
+    """
+    Contacts of the grid engines : every cell with its 8 neighbours (fewer on the borders)
+
+    :param length: number of lines of the board
+    :param width: number of columns of the board
+    :return: contact network
+    """
+    return network_from_edges(length * width, *grid_edges(length, width))
+
+
+def small_world_network(length: int, width: int, rewiring_rate: float, rng: np.random.Generator) -> ContactNetwork:
+    """
+    Grid contacts, of which a part is rewired to random cells anywhere on the board (Watts-Strogatz model)
+
+    :param length: number of lines of the board
+    :param width: number of columns of the board
+    :param rewiring_rate: probability that an edge is rewired
+    :param rng: random generator
+    :return: contact network
+    """
+    sources, targets = grid_edges(length, width)
+    rewired = np.flatnonzero(rng.random(sources.size) < rewiring_rate)
+    targets[rewired] = rng.integers(length * width, size=rewired.size)
+
+    # Pas de contact d'une case avec elle-même
+    kept = sources != targets
+    return network_from_edges(length * width, sources[kept], targets[kept])
+
+
+def geometric_network(length: int, width: int, radius: float, rng: np.random.Generator) -> ContactNetwork:
+    """
+    Random geometric contacts : every cell holds a person at a random position inside it, in contact with the people
+    closer than radius
+
+    :param length: number of lines of the board
+    :param width: number of columns of the board
+    :param radius: contact distance, in cells
+    :param rng: random generator
+    :return: contact network
+    """
+    px = np.arange(length).repeat(width) + rng.random(length * width)
+    py = np.tile(np.arange(width), length) + rng.random(length * width)
+    x, y = np.divmod(np.arange(length * width), width)
+
+    # Chaque paire de cases assez proches n'est examinée qu'une fois, dans le demi-plan des décalages
+    reach = int(np.ceil(radius))
+    sources, targets = [], []
+    for dx in range(0, reach + 1):
+        for dy in range(-reach, reach + 1):
+            if dx == 0 and dy <= 0:
+                continue
+            node = np.flatnonzero((x + dx < length) & (y + dy >= 0) & (y + dy < width))
+            other = node + dx * width + dy
+            close = (px[node] - px[other]) ** 2 + (py[node] - py[other]) ** 2 < radius ** 2
+            sources.append(node[close])
+            targets.append(other[close])
+
+    return network_from_edges(length * width, np.concatenate(sources), np.concatenate(targets))
@@ -1,12 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import copy
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from random import random, randrange
-from typing import NewType
+from typing import Any, Callable, Dict, List, NewType, Optional, Tuple, Union
+
+from BoardCodec import CODEC_ZLIB, ZLIB_LEVEL, decode_board, encode_board
+from BoardHistory import BoardHistory, DeltaHistory, STATE_DTYPE
+from ContactNetwork import ContactNetwork, grid_network
+from EventScheduler import EventScheduler
+from Kernel import BOUNDARIES, BOUNDARY_CLIPPED, check_kernel, contamination_log_escape, moore_kernel
 
 BoardState = NewType("BoardState", np.ndarray)  # type: ignore
 
+# Graine d'un générateur aléatoire : None pour une graine tirée au hasard
+Seed = Optional[Union[int, np.random.SeedSequence]]
+
+# Taille d'un plateau : un côté pour un plateau carré, ou (lignes, colonnes)
+BoardSize = Union[int, Tuple[int, int]]
+
 
 # Couleur associée à l'état
 STATE = {
@@ -18,15 +34,124 @@ STATE = {
     "DECEASED": 4
 }
 
+# Version du modèle, à incrémenter quand une modification change les résultats des simulations
+MODEL_VERSION = 3
 
-class DiseaseBoard:
-    def __init__(self, size: int, cluster_nbr: int) -> None:
+# Noms des états, dans l'ordre de leur valeur
+STATE_NAMES = sorted(STATE, key=STATE.get)  # type: ignore
+
+# Moteurs de calcul disponibles pour next_round
+ENGINE_LOOP = "loop"
+ENGINE_NUMPY = "numpy"
+ENGINE_FRONTIER = "frontier"
+ENGINE_EVENT = "event"
+ENGINE_STRIPES = "stripes"
+ENGINE_NETWORK = "network"
+ENGINES = (ENGINE_LOOP, ENGINE_NUMPY, ENGINE_FRONTIER, ENGINE_EVENT, ENGINE_STRIPES, ENGINE_NETWORK)
+
+# Nombre de bandes du moteur "stripes" par défaut : le résultat en dépend, pas du nombre de coeurs
+STRIPE_NBR = 8
+
+# Etats des personnes malades, suivis par les moteurs "frontier" et "event"
+SICK_STATES = [STATE["INFECTED"], STATE["QUARANTINE"], STATE["HOSPITALIZED"]]
+
+# Version du format des points de reprise, à changer si leur contenu change
+CHECKPOINT_VERSION = 1
+
+# Nombre de tours prévus à la création des compteurs, doublé à chaque fois qu'il est atteint
+COUNTER_CAPACITY = 64
+
+# Dates de contamination, relatives à une origine avancée quand le tour courant s'en éloigne de plus de DATE_SPAN.
+# Les dates plus anciennes que DATE_SPAN sont ramenées à -DATE_SPAN : les délais du modèle doivent rester en deçà
+DATE_DTYPE = np.int16
+DATE_SPAN = int(np.iinfo(DATE_DTYPE).max) // 2
+
+# Nombre de cases tirées à la fois à l'initialisation, pour que la mémoire utilisée ne dépende pas du plateau
+INIT_CELL_NBR = 1 << 22
+
+MOORE_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+
+
+def board_shape(size: BoardSize) -> Tuple[int, int]:
+    """
+    :param size: side of a square board, or (length, width)
+    :return: (length, width) of the board
+    """
+    if isinstance(size, (tuple, list)):
+        length, width = size
+        return int(length), int(width)
+    return int(size), int(size)
+
+
+def moore_count(mask: np.ndarray) -> np.ndarray:
+    """
+    Count, for every cell, how many of its 8 neighbours are set in mask (borders are clipped)
+
+    :param mask: boolean board, or stack of boards along the first axes
+    :return: neighbour count board(s)
+    """
+    length, width = mask.shape[-2:]
+    padded = np.pad(mask.astype(np.uint8), [(0, 0)] * (mask.ndim - 2) + [(1, 1), (1, 1)])
+    count = np.zeros(mask.shape, dtype=np.uint8)
+    for dx in range(3):
+        for dy in range(3):
+            if dx == 1 and dy == 1:
+                continue
+            count += padded[..., dx:dx + length, dy:dy + width]
+
+    return count
+
+
+# Threads du moteur "stripes", partagés par tous les plateaux du processus
+_stripe_executor: Optional[ThreadPoolExecutor] = None
+
+
+def stripe_executor() -> ThreadPoolExecutor:
+    """
+    :return: thread pool of the stripes engine, with one thread per core, created on first use
+    """
+    global _stripe_executor
+    if _stripe_executor is None:
+        _stripe_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _stripe_executor
+
+
+def bernoulli(mask: np.ndarray, rate: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw, in one batch, a random() <= rate test for every cell set in mask
+
+    :param mask: boolean board of the cells to test
+    :param rate: success probability
+    :param rng: random generator
+    :return: boolean board of the successful cells
+    """
+    hits = np.zeros_like(mask)
+    nbr = np.count_nonzero(mask)
+    if nbr:
+        hits[mask] = rng.random(nbr) <= rate
 
-        self._length: int = size
-        self._width: int = size
+    return hits
+
+
+class DiseaseBoard:
+    def __init__(self, size: BoardSize, cluster_nbr: int, engine: str = ENGINE_LOOP,
+                 history: Optional[BoardHistory] = None, seed: Seed = None, storage: Optional[str] = None) -> None:
+        """
+        :param size: side of a square board, or (length, width)
+        :param cluster_nbr: number of initial disease clusters
+        :param engine: simulation engine, one of ENGINES
+        :param history: round history (None for a DeltaHistory)
+        :param seed: seed of the board random generator
+        :param storage: directory of the memory-mapped board and contamination dates, for boards that do not fit in
+                        memory (None to keep them in memory)
+        """
+        self._length, self._width = board_shape(size)
 
         self._cluster_nbr: int = cluster_nbr
 
+        self._engine: str = ENGINE_LOOP
+        self.engine = engine
+
         self._immunity_rate: float = 0.2
 
         self._death_rate: float = 0.03
@@ -46,10 +171,49 @@ class DiseaseBoard:
         self._socialDistancingDelay: int = -1
         self._socialDistancingContagionRate: float = 0
 
-        self._state_db: list[BoardState] = []
-        self._contamination_dates = np.zeros((self._length, self._width), dtype=int)
+        # Par défaut, on garde tous les tours, sous forme de différences entre tours
+        self._state_db: BoardHistory = history if history is not None else DeltaHistory()
+        self._storage: Optional[str] = storage
+        self._board: BoardState = BoardState(self._new_array("board", STATE_DTYPE))
+        self._contamination_dates: np.ndarray = self._new_array("contamination_dates", DATE_DTYPE)
+        self._date_origin: int = 0
         self._current_round: int = 0
-        self._counter: list = []
+        # Compteurs de chaque état, une ligne par tour : seules les lignes jusqu'au tour courant sont valides
+        self._counter: np.ndarray = np.zeros((COUNTER_CAPACITY, len(STATE)), dtype=np.int64)
+
+        # Cases modifiées au dernier tour (index à plat, nouvel état), None avant le premier tour
+        self._last_changes: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        # Tous les tirages aléatoires du plateau viennent de ce générateur
+        self._seed: Seed = seed
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+
+        # Index des cases malades, valable pour le tour _active_round (moteurs "frontier" et "event")
+        self._active: np.ndarray = np.empty(0, dtype=np.intp)
+        self._active_round: int = -1
+
+        # Contrôles de transition réservés, valables pour le tour _scheduler_round (moteur "event")
+        self._scheduler: EventScheduler = EventScheduler()
+        self._scheduler_round: int = -1
+        self._scheduled_delays: Tuple[int, ...] = ()
+
+        # Moteur "stripes" : une bande de lignes par tâche, chacune avec son générateur, créés au premier tour
+        self._stripe_nbr: int = STRIPE_NBR
+        self._stripe_rngs: Optional[List[np.random.Generator]] = None
+
+        # Moteur "network" : contacts entre les cases, la grille de Moore si aucun réseau n'est donné. Cette grille
+        # est construite au premier tour et n'est ni enregistrée dans les points de reprise, ni envoyée aux processus
+        self._network: Optional[ContactNetwork] = None
+        self._grid_network: Optional[ContactNetwork] = None
+
+        # Moteur "numpy" : poids de contagion de chaque voisin, les 8 voisins de Moore si aucun noyau n'est donné
+        self._kernel: Optional[np.ndarray] = None
+        self._boundary: str = BOUNDARY_CLIPPED
+
+        # Plateau initial structuré, à la place de immunity_rate et cluster_nbr à partir du prochain reset :
+        # probabilité d'immunité de chaque case, et (ligne, colonne) des clusters
+        self._immunity_map: Optional[np.ndarray] = None
+        self._cluster_cells: Optional[np.ndarray] = None
 
         self.reset()
 
@@ -57,6 +221,43 @@ class DiseaseBoard:
     # Gestion des attributs #
     #########################
 
+    @property
+    def engine(self) -> str:
+        return self._engine
+
+    @engine.setter
+    def engine(self, engine) -> None:
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine %r, expected one of %s" % (engine, ", ".join(ENGINES)))
+        self._engine = engine
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def storage(self) -> Optional[str]:
+        return self._storage
+
+    @property
+    def history(self) -> BoardHistory:
+        return self._state_db
+
+    @property
+    def seed(self) -> Seed:
+        return self._seed
+
+    @property
+    def last_changes(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        :return: flat index and new state of the cells changed by the last round, None at round 0 or if unknown
+        """
+        return self._last_changes
+
     @property
     def immunity_rate(self) -> float:
         return self._immunity_rate
@@ -147,40 +348,47 @@ class DiseaseBoard:
 
     @property
     def deceased_nbr(self) -> int:
-        return self._counter[STATE["DECEASED"]][-1]
+        return self._counter[self._current_round, STATE["DECEASED"]]
+
+    @property
+    def deceased_data(self) -> np.ndarray:
+        return self.state_data("DECEASED")
 
     @property
-    def deceased_data(self) -> list:
-        return self._counter[STATE["DECEASED"]]
+    def infected_data(self) -> np.ndarray:
+        return self.state_data("INFECTED")
 
     @property
-    def infected_data(self) -> list:
-        return self._counter[STATE["INFECTED"]]
+    def quarantined_data(self) -> np.ndarray:
+        return self.state_data("QUARANTINE")
 
     @property
-    def quarantined_data(self) -> list:
-        return self._counter[STATE["QUARANTINE"]]
+    def hospitalized_data(self) -> np.ndarray:
+        return self.state_data("HOSPITALIZED")
 
     @property
-    def hospitalized_data(self) -> list:
-        return self._counter[STATE["HOSPITALIZED"]]
+    def counters(self) -> np.ndarray:
+        """
+        :return: (round, state) counters, as a view updated by the following rounds
+        """
+        return self._counter[:self._current_round + 1]
 
     @property
     def sick_nbr(self) -> int:
-        states = ["INFECTED", "HOSPITALIZED", "QUARANTINE"]
-        return sum([self._counter[STATE[state]][-1] for state in states])
+        return sum([self._counter[self._current_round, state] for state in SICK_STATES])
 
     @property
     def diagnosed_nbr(self) -> int:
-        return self._counter[STATE["HOSPITALIZED"]][-1] + self._counter[STATE["QUARANTINE"]][-1]
+        return self._counter[self._current_round, STATE["HOSPITALIZED"]] + \
+            self._counter[self._current_round, STATE["QUARANTINE"]]
 
     @property
     def hospitalized_nbr(self) -> int:
-        return self._counter[STATE["HOSPITALIZED"]][-1]
+        return self._counter[self._current_round, STATE["HOSPITALIZED"]]
 
     @property
     def quarantined_nbr(self) -> int:
-        return self._counter[STATE["QUARANTINE"]][-1]
+        return self._counter[self._current_round, STATE["QUARANTINE"]]
 
     @property
     def R0(self) -> float:
@@ -202,6 +410,71 @@ class DiseaseBoard:
     def social_distancing_delay(self, new_delay) -> None:
         self._socialDistancingDelay = new_delay
 
+    @property
+    def stripe_nbr(self) -> int:
+        return self._stripe_nbr
+
+    @stripe_nbr.setter
+    def stripe_nbr(self, stripe_nbr) -> None:
+        if stripe_nbr < 1:
+            raise ValueError("stripe_nbr must be a positive number, got %d" % stripe_nbr)
+        self._stripe_nbr = stripe_nbr
+        self._stripe_rngs = None
+
+    @property
+    def network(self) -> Optional[ContactNetwork]:
+        return self._network
+
+    @network.setter
+    def network(self, network: Optional[ContactNetwork]) -> None:
+        if network is not None and network.node_nbr != self.population:
+            raise ValueError("The network has %d nodes, the board %d cells" % (network.node_nbr, self.population))
+        self._network = network
+
+    @property
+    def kernel(self) -> Optional[np.ndarray]:
+        return self._kernel
+
+    @kernel.setter
+    def kernel(self, kernel: Optional[np.ndarray]) -> None:
+        if kernel is not None:
+            kernel = np.asarray(kernel, dtype=float)
+            check_kernel(kernel)
+        self._kernel = kernel
+
+    @property
+    def boundary(self) -> str:
+        return self._boundary
+
+    @boundary.setter
+    def boundary(self, boundary) -> None:
+        if boundary not in BOUNDARIES:
+            raise ValueError("Unknown boundary %r, expected one of %s" % (boundary, ", ".join(BOUNDARIES)))
+        self._boundary = boundary
+
+    @property
+    def immunity_map(self) -> Optional[np.ndarray]:
+        return self._immunity_map
+
+    @immunity_map.setter
+    def immunity_map(self, immunity_map: Optional[np.ndarray]) -> None:
+        if immunity_map is not None and immunity_map.shape != (self._length, self._width):
+            raise ValueError("The immunity map has shape %s, the board %s" % (immunity_map.shape,
+                                                                              (self._length, self._width)))
+        self._immunity_map = immunity_map
+
+    @property
+    def cluster_cells(self) -> Optional[np.ndarray]:
+        return self._cluster_cells
+
+    @cluster_cells.setter
+    def cluster_cells(self, cluster_cells: Optional[np.ndarray]) -> None:
+        if cluster_cells is not None:
+            cluster_cells = np.unique(np.asarray(cluster_cells, dtype=np.int64).reshape(-1, 2), axis=0)
+            if (cluster_cells < 0).any() or (cluster_cells >= (self._length, self._width)).any():
+                raise ValueError("Cluster cells must be inside the board")
+        self._cluster_cells = cluster_cells
+
     @property
     def social_distancing_contagion_rate(self) -> float:
         return self._socialDistancingContagionRate
@@ -214,102 +487,169 @@ class DiseaseBoard:
     # Fin de la gestion des attributs #
     ###################################
 
+    def _new_array(self, name: str, dtype) -> np.ndarray:
+        """
+        :param name: name of the array, and of its file in the storage directory
+        :param dtype: type of the values
+        :return: (length, width) array of zeros, memory-mapped if the board has a storage directory
+        """
+        if self._storage is None:
+            return np.zeros((self._length, self._width), dtype=dtype)
+
+        os.makedirs(self._storage, exist_ok=True)
+        return np.lib.format.open_memmap(os.path.join(self._storage, name + ".npy"), mode="w+", dtype=dtype,
+                                         shape=(self._length, self._width))
+
     def init_board(self) -> None:
-        etat0: BoardState = BoardState(np.zeros((self._length, self._width), dtype=int))
-        etat0[0:self._length, 0:self._width] = STATE["SUSCEPTIBLE"]
+        # Le plateau est réutilisé, pour ne pas recréer ses fichiers quand il est projeté en mémoire
+        etat0: BoardState = self._board
+        etat0[...] = STATE["SUSCEPTIBLE"]
+        self._contamination_dates[...] = 0
+        self._date_origin = 0
+
+        # Creation de la population immunisée, par blocs de lignes : les tirages sont les mêmes qu'en une fois
+        rows = max(1, INIT_CELL_NBR // self._width)
+        for top in range(0, self._length, rows):
+            block = etat0[top:top + rows]
+            rate = self._immunity_rate if self._immunity_map is None else self._immunity_map[top:top + rows]
+            block[self._rng.random(block.shape) < rate] = STATE["IMMUNE"]
+
+        x0, y0 = self._initial_clusters()
+        etat0[x0, y0] = STATE["INFECTED"]
+        self._contamination_dates[x0, y0] = -1
+        self._counter[0, STATE["INFECTED"]] = x0.size
+
+        self._board = etat0
+        self._state_db.append(0, etat0)
+
+    def _initial_clusters(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: line and column of the initial clusters : cluster_cells if given, else cluster_nbr distinct random
+                 cells
+        """
+        if self._cluster_cells is not None:
+            return self._cluster_cells[:, 0], self._cluster_cells[:, 1]
 
-        # Creation de la population immunisée
-        for x in range(self._length):
-            for y in range(self._width):
-                if random() < self._immunity_rate:
-                    etat0[x, y] = STATE["IMMUNE"]
+        cells = self._rng.choice(self.population, min(self._cluster_nbr, self.population), replace=False)
+        return np.divmod(cells, self._width)
 
-        for i in range(self._cluster_nbr):
-            x0 = randrange(self._length)
-            y0 = randrange(self._width)
-            etat0[x0, y0] = STATE["INFECTED"]
-            self._contamination_dates[x0, y0] = -1
+    def reset(self, seed: Seed = None) -> None:
+        """
+        Draw a new initial board and go back to round 0
 
-            self._state_db.append(etat0)
-            self._counter[STATE["INFECTED"]][0] += 1
+        :param seed: new seed of the random generator (None to go on with the current random stream)
+        """
+        if seed is not None:
+            self._seed = seed
+            self._rng = np.random.default_rng(seed)
 
-    def reset(self) -> None:
-        self._counter = []
-        for n in range(len(STATE.items())):
-            self._counter.append([])
-            self._counter[n].append(0)
+        self._counter = np.zeros((COUNTER_CAPACITY,) + self._counter.shape[1:], dtype=np.int64)
 
+        self._state_db.clear()
         self.init_board()
 
         self._current_round = 0
+        self._last_changes = None
+        self._active_round = -1
+        self._scheduler_round = -1
+        self._stripe_rngs = None
 
     def next_round(self) -> BoardState:
         """
         Create next round state
 
+        The board is updated in place : the returned board is the same object as last_board(), and is modified by the
+        following rounds.
+
         :return: next round state
         """
-        neighbours = []
-        current_state: BoardState = self._state_db[-1]
-        state = current_state.copy()
+        current_state: BoardState = self._board
 
         # social distancing effect
         if self._current_round == self._socialDistancingDelay:
             self._contagion_rate = self._socialDistancingContagionRate
 
+        if self._engine != ENGINE_NUMPY and not self._moore_contagion():
+            raise ValueError("Kernels and periodic boundaries are only supported by the %r engine" % ENGINE_NUMPY)
+
         # We initialize the next round data with the same data as previous round
-        for n in range(len(STATE.items())):
-            self._counter[n].append(self._counter[n][-1])
+        self._grow_counter()
+        self._counter[self._current_round + 1] = self._counter[self._current_round]
+
+        if self._engine == ENGINE_NUMPY:
+            index, states = self._next_round_numpy(current_state)
+        elif self._engine == ENGINE_FRONTIER:
+            index, states = self._next_round_frontier(current_state)
+        elif self._engine == ENGINE_EVENT:
+            index, states = self._next_round_event(current_state)
+        elif self._engine == ENGINE_STRIPES:
+            index, states = self._next_round_stripes(current_state)
+        elif self._engine == ENGINE_NETWORK:
+            index, states = self._next_round_frontier(current_state, self._contaminate_network)
+        else:
+            index, states = self._next_round_loop(current_state)
+
+        board = self._board.ravel()
+        self._count_changes(board[index], states)
+        board[index] = states
+
+        self._current_round += 1
+        self._last_changes = (index, states)
+        self._state_db.append(self._current_round, self._board, self._last_changes)
+
+        return self._board
+
+    def _next_round_loop(self, current_state: BoardState) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reference engine : visit every cell of the board in a Python loop
+
+        :param current_state: current round state
+        :return: flat index of the changed cells, new states of these cells
+        """
+        neighbours = []
+        state = current_state.copy()
+        today = self._today()
+
+        # Tirages du tour, faits en une fois : au plus 2 par case malade, plus 8 par case infectée pour ses voisins
+        sick_nbr = np.count_nonzero(np.isin(current_state, SICK_STATES))
+        infected_nbr = np.count_nonzero(current_state == STATE["INFECTED"])
+        random = iter(self._rng.random(2 * sick_nbr + 8 * infected_nbr).tolist()).__next__
 
         for x in range(self._length):
             for y in range(self._width):
                 if current_state[x, y] == STATE["QUARANTINE"]:
-                    if self._current_round - self._contamination_dates[x, y] == self._contagion_delay:
+                    if today - self._contamination_dates[x, y] == self._contagion_delay:
                         state[x, y] = STATE["IMMUNE"]
-                        self._counter[STATE["QUARANTINE"]][-1] -= 1
-                        self._counter[STATE["IMMUNE"]][-1] += 1
                         continue
 
-                    if self._current_round - self._contamination_dates[x, y] == self._hospitalized_delay:
+                    if today - self._contamination_dates[x, y] == self._hospitalized_delay:
                         if random() <= self._hospitalized_rate:
                             state[x, y] = STATE["HOSPITALIZED"]
-                            self._counter[STATE["QUARANTINE"]][-1] -= 1
-                            self._counter[STATE["HOSPITALIZED"]][-1] += 1
                             continue
 
                 if current_state[x, y] == STATE["HOSPITALIZED"]:
-                    if self._current_round - self._contamination_dates[x, y] == self._death_delay:
+                    if today - self._contamination_dates[x, y] == self._death_delay:
                         if random() <= self._death_rate / self._hospitalized_rate:
                             state[x, y] = STATE["DECEASED"]
-                            self._counter[STATE["HOSPITALIZED"]][-1] -= 1
-                            self._counter[STATE["DECEASED"]][-1] += 1
                             continue
 
-                    if self._current_round - self._contamination_dates[x, y] == self._contagion_delay:
+                    if today - self._contamination_dates[x, y] == self._contagion_delay:
                         state[x, y] = STATE["IMMUNE"]
-                        self._counter[STATE["HOSPITALIZED"]][-1] -= 1
-                        self._counter[STATE["IMMUNE"]][-1] += 1
                         continue
 
                 if current_state[x, y] == STATE["INFECTED"]:
-                    if self._current_round - self._contamination_dates[x, y] == self._diagnosis_delay:
+                    if today - self._contamination_dates[x, y] == self._diagnosis_delay:
                         if random() <= self._quarantine_rate:
                             state[x, y] = STATE["QUARANTINE"]
-                            self._counter[STATE["INFECTED"]][-1] -= 1
-                            self._counter[STATE["QUARANTINE"]][-1] += 1
                             continue
 
-                    if self._current_round - self._contamination_dates[x, y] == self._hospitalized_delay:
+                    if today - self._contamination_dates[x, y] == self._hospitalized_delay:
                         if random() <= self._hospitalized_rate:
                             state[x, y] = STATE["HOSPITALIZED"]
-                            self._counter[STATE["INFECTED"]][-1] -= 1
-                            self._counter[STATE["HOSPITALIZED"]][-1] += 1
                             continue
 
-                    if self._current_round - self._contamination_dates[x, y] == self._contagion_delay:
+                    if today - self._contamination_dates[x, y] == self._contagion_delay:
                         state[x, y] = STATE["IMMUNE"]
-                        self._counter[STATE["INFECTED"]][-1] -= 1
-                        self._counter[STATE["IMMUNE"]][-1] += 1
                         continue
 
                     #
@@ -345,18 +685,661 @@ class DiseaseBoard:
                     for nb in neighbours:
                         if current_state[nb[0], nb[1]] == STATE["SUSCEPTIBLE"]:
                             if random() < self._contagion_rate:
-                                self._contamination_dates[nb[0], nb[1]] = self._current_round
+                                self._contamination_dates[nb[0], nb[1]] = today
+                                state[nb[0], nb[1]] = STATE["INFECTED"]
 
-                                # Same person might have been infected at the same round by another person : the
-                                # tests avoids double counting
-                                if not state[nb[0], nb[1]] == STATE["INFECTED"]:
-                                    state[nb[0], nb[1]] = STATE["INFECTED"]
-                                    self._counter[STATE["INFECTED"]][-1] += 1
+        index = np.flatnonzero(state != current_state)
+        return index, state.ravel()[index]
 
-        self._state_db.append(state)
-        self._current_round += 1
+    def _next_round_numpy(self, current_state: BoardState) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized engine : same transitions as the loop engine, computed with whole-board masks
 
-        return state
+        A susceptible cell with n contagious neighbours is infected with probability 1 - (1 - contagion_rate) ** n,
+        which is the probability that at least one of the n per-neighbour draws of the loop engine succeeds.
+        With a kernel, the draw of each neighbour succeeds with probability contagion_rate * k, k being the kernel
+        weight of the neighbour.
+
+        :param current_state: current round state
+        :return: flat index of the changed cells, new states of these cells
+        """
+        today = self._today()
+        state, contagious = self._transitions(current_state, today - self._contamination_dates)
+
+        # Contamination des voisins
+        if contagious.any():
+            exposed, contamination_proba = self._contamination_proba(contagious, current_state == STATE["SUSCEPTIBLE"])
+            newly_infected = np.zeros_like(exposed)
+            newly_infected[exposed] = self._rng.random(contamination_proba.size) < contamination_proba
+            state[newly_infected] = STATE["INFECTED"]
+            self._contamination_dates[newly_infected] = today
+
+        index = np.flatnonzero(state != current_state)
+        return index, state.ravel()[index]
+
+    def _next_round_frontier(self, current_state: BoardState,
+                             contaminate: Optional[Callable[[np.ndarray], np.ndarray]] = None
+                             ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Active frontier engine : same computations as the vectorized engine, restricted to the sick cells (infected,
+        quarantined or hospitalized) and to the susceptible neighbours of the contagious ones
+
+        The flat index of the sick cells is kept from one round to the next, so that the cost of a round depends on
+        the size of the outbreak instead of the board area. The network engine is this engine, with contaminations
+        along the contact network instead of the grid.
+
+        :param current_state: current round state
+        :param contaminate: contamination of the contacts of the contagious cells (None for the grid neighbours)
+        :return: flat index of the changed cells, new states of these cells
+        """
+        if contaminate is None:
+            contaminate = self._contaminate
+        if self._active_round != self._current_round:
+            self._active = np.flatnonzero(np.isin(current_state, SICK_STATES))
+
+        board = current_state.ravel()
+        dates = self._contamination_dates.ravel()
+        active = self._active
+
+        active_states = board[active]
+        states, contagious = self._transitions(active_states, self._today() - dates[active])
+
+        newly_infected = contaminate(active[contagious])
+
+        changed = states != active_states
+        still_sick = np.isin(states, SICK_STATES)
+        self._active = np.concatenate((active[still_sick], newly_infected))
+        self._active_round = self._current_round + 1
+
+        index = np.concatenate((active[changed], newly_infected))
+        new_states = np.concatenate((states[changed], np.full(newly_infected.size, STATE["INFECTED"], STATE_DTYPE)))
+        return index, new_states
+
+    def _next_round_event(self, current_state: BoardState) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Event engine : same as the active frontier engine, but the transitions are only computed for the cells due
+        that round
+
+        The rounds at which a cell may change state (diagnosis, hospitalization, death and end of contagion delays
+        after its contamination) are booked in the scheduler when it is infected. The booking is rebuilt from the
+        contamination dates if a delay changes during the run. A round still reads the state of every sick cell and
+        contaminates from every contagious one, so it costs about as much as a frontier round.
+
+        :param current_state: current round state
+        :return: flat index of the changed cells, new states of these cells
+        """
+        board = current_state.ravel()
+        dates = self._contamination_dates.ravel()
+        delays = (self._diagnosis_delay, self._hospitalized_delay, self._contagion_delay, self._death_delay)
+
+        if self._active_round != self._current_round:
+            self._active = np.flatnonzero(np.isin(current_state, SICK_STATES))
+        if self._scheduler_round != self._current_round or self._scheduled_delays != delays:
+            self._scheduler.clear()
+            active_dates = self._date_origin + dates[self._active].astype(np.int64)
+            self._scheduler.schedule_contaminations(self._active, active_dates, delays, self._current_round)
+            self._scheduled_delays = delays
+        active = self._active
+
+        due = self._scheduler.pop(self._current_round)
+        due = due[np.isin(board[due], SICK_STATES)]
+        due_states = board[due]
+        states, _ = self._transitions(due_states, self._today() - dates[due])
+        changed = states != due_states
+
+        # Etat des cases actives au tour suivant, comme le moteur à frontière active : les changements des cases dues
+        # sont écrits le temps de lire les cases actives, puis annulés (next_round les applique)
+        due, due_states, states = due[changed], due_states[changed], states[changed]
+        board[due] = states
+        active_states = board[active]
+        board[due] = due_states
+
+        # Les cases infectées qui n'ont pas changé d'état sont contagieuses
+        newly_infected = self._contaminate(active[active_states == STATE["INFECTED"]])
+        self._scheduler.schedule_contaminations(newly_infected, np.full(newly_infected.size, self._current_round),
+                                                delays, self._current_round + 1)
+
+        self._active = np.concatenate((active[np.isin(active_states, SICK_STATES)], newly_infected))
+        self._active_round = self._current_round + 1
+        self._scheduler_round = self._current_round + 1
+
+        index = np.concatenate((due, newly_infected))
+        new_states = np.concatenate((states, np.full(newly_infected.size, STATE["INFECTED"], STATE_DTYPE)))
+        return index, new_states
+
+    def _next_round_stripes(self, current_state: BoardState) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stripe-parallel engine : same computations as the vectorized engine, on bands of rows processed by a thread
+        pool (NumPy releases the GIL on whole-array operations)
+
+        Each band draws from its own random generator. The transitions of every band are computed first; then each
+        band counts the contagious neighbours of its cells, reading one row above and below it, so that the
+        contaminations across band borders are decided by the band of the contaminated cell. The result depends on
+        the number of bands, not on the number of threads.
+
+        :param current_state: current round state
+        :return: flat index of the changed cells, new states of these cells
+        """
+        if self._stripe_rngs is None:
+            entropy = self._rng.integers(np.iinfo(np.int64).max, size=4)
+            self._stripe_rngs = [np.random.default_rng(seed)
+                                 for seed in np.random.SeedSequence(entropy.tolist()).spawn(self._stripe_nbr)]
+
+        bounds = np.linspace(0, self._length, self._stripe_nbr + 1).astype(int)
+        stripes = [(int(top), int(bottom), rng) for top, bottom, rng in zip(bounds, bounds[1:], self._stripe_rngs)
+                   if top < bottom]
+
+        state = np.empty_like(current_state)
+        contagious = np.empty(current_state.shape, dtype=bool)
+        today = self._today()
+
+        def transitions(stripe: Tuple[int, int, np.random.Generator]) -> None:
+            top, bottom, rng = stripe
+            age = today - self._contamination_dates[top:bottom]
+            state[top:bottom], contagious[top:bottom] = self._transitions(current_state[top:bottom], age, rng)
+
+        def contaminate(stripe: Tuple[int, int, np.random.Generator]) -> np.ndarray:
+            top, bottom, rng = stripe
+
+            # Bande entourée d'une ligne de chaque côté, pour les voisins contagieux des bandes voisines
+            halo_top, halo_bottom = max(top - 1, 0), min(bottom + 1, self._length)
+            if contagious[halo_top:halo_bottom].any():
+                contagious_nbr = moore_count(contagious[halo_top:halo_bottom])[top - halo_top:bottom - halo_top]
+                exposed = (current_state[top:bottom] == STATE["SUSCEPTIBLE"]) & (contagious_nbr > 0)
+                contamination_proba = 1 - (1 - self._contagion_rate) ** contagious_nbr[exposed]
+                newly_infected = np.zeros_like(exposed)
+                newly_infected[exposed] = rng.random(contamination_proba.size) < contamination_proba
+                state[top:bottom][newly_infected] = STATE["INFECTED"]
+                self._contamination_dates[top:bottom][newly_infected] = today
+
+            return np.flatnonzero(state[top:bottom] != current_state[top:bottom]) + top * self._width
+
+        executor = stripe_executor()
+        list(executor.map(transitions, stripes))
+        index = np.concatenate(list(executor.map(contaminate, stripes)))
+        return index, state.ravel()[index]
+
+    def _moore_contagion(self) -> bool:
+        """
+        :return: True if the contagion reaches the 8 neighbours of a cell, inside the board, as in the loop engine
+        """
+        return self._kernel is None and self._boundary == BOUNDARY_CLIPPED
+
+    def _contamination_proba(self, contagious: np.ndarray,
+                             susceptible: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Infection probability of the susceptible cells, 1 - prod(1 - contagion_rate * k) over their contagious
+        neighbours, k being the kernel weight of each neighbour
+
+        :param contagious: boolean board of the contagious cells, or stack of boards
+        :param susceptible: boolean board of the susceptible cells, or stack of boards
+        :return: boolean board of the susceptible cells with at least one contagious neighbour, and their infection
+                 probability
+        """
+        if self._moore_contagion():
+            contagious_nbr = moore_count(contagious)
+            exposed = susceptible & (contagious_nbr > 0)
+            return exposed, 1 - (1 - self._contagion_rate) ** contagious_nbr[exposed]
+
+        kernel = self._kernel if self._kernel is not None else moore_kernel()
+        log_escape = contamination_log_escape(contagious, kernel, self._contagion_rate, self._boundary)
+        exposed = susceptible & (log_escape < 0)
+        return exposed, -np.expm1(log_escape[exposed])
+
+    def _contaminate(self, contagious: np.ndarray) -> np.ndarray:
+        """
+        Contaminate the susceptible neighbours of contagious cells
+
+        A susceptible cell with n contagious neighbours is infected with probability 1 - (1 - contagion_rate) ** n.
+
+        :param contagious: flat index of the contagious cells
+        :return: flat index of the newly infected cells, whose contamination date is set
+        """
+        if contagious.size == 0:
+            return np.empty(0, dtype=np.intp)
+
+        board = self._board.ravel()
+        x, y = np.divmod(contagious, self._width)
+        neighbours = []
+        for dx, dy in MOORE_OFFSETS:
+            nx, ny = x + dx, y + dy
+            inside = (nx >= 0) & (nx < self._length) & (ny >= 0) & (ny < self._width)
+            neighbours.append(nx[inside] * self._width + ny[inside])
+
+        # Les voisins susceptibles apparaissent autant de fois qu'ils ont de voisins contagieux
+        exposed = np.concatenate(neighbours)
+        exposed = exposed[board[exposed] == STATE["SUSCEPTIBLE"]]
+        exposed, contagious_nbr = np.unique(exposed, return_counts=True)
+        contamination_proba = 1 - (1 - self._contagion_rate) ** contagious_nbr
+        newly_infected = exposed[self._rng.random(exposed.size) < contamination_proba]
+        self._contamination_dates.ravel()[newly_infected] = self._today()
+
+        return newly_infected
+
+    def _contaminate_network(self, contagious: np.ndarray) -> np.ndarray:
+        """
+        Contaminate the susceptible contacts of contagious cells, along the contact network
+
+        A susceptible cell is infected with probability 1 - prod(1 - contagion_rate * weight) over its contacts with
+        contagious cells, which is the grid engines probability when every weight is 1.
+
+        :param contagious: flat index of the contagious cells
+        :return: flat index of the newly infected cells, whose contamination date is set
+        """
+        if contagious.size == 0:
+            return np.empty(0, dtype=np.intp)
+        network = self._network
+        if network is None:
+            if self._grid_network is None:
+                self._grid_network = grid_network(self._length, self._width)
+            network = self._grid_network
+
+        board = self._board.ravel()
+        contacts, weights = network.contacts(contagious)
+        susceptible = board[contacts] == STATE["SUSCEPTIBLE"]
+        exposed, contact_of = np.unique(contacts[susceptible], return_inverse=True)
+
+        # Produit des probabilités d'échapper à chaque contact, calculé comme une somme de logarithmes
+        with np.errstate(divide="ignore"):
+            escape = np.log1p(-np.minimum(self._contagion_rate * weights[susceptible], 1))
+        contamination_proba = 1 - np.exp(np.bincount(contact_of, weights=escape, minlength=exposed.size))
+        newly_infected = exposed[self._rng.random(exposed.size) < contamination_proba].astype(np.intp)
+        self._contamination_dates.ravel()[newly_infected] = self._today()
+
+        return newly_infected
+
+    def _transitions(self, states: np.ndarray, age: np.ndarray,
+                     rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the state transitions of a set of cells, in the same order as the loop engine
+
+        An infected cell that changes state during the round does not contaminate its neighbours.
+
+        :param states: current states of the cells (board or flat array)
+        :param age: number of rounds since the contamination of the cells
+        :param rng: random generator of the draws (None for the board generator)
+        :return: next states of the cells, mask of the cells contagious during this round
+        """
+        if rng is None:
+            rng = self._rng
+        next_states = states.copy()
+
+        quarantine = states == STATE["QUARANTINE"]
+        hospitalized = states == STATE["HOSPITALIZED"]
+        infected = states == STATE["INFECTED"]
+
+        # Quarantine : recovery, then hospitalization
+        quarantine_immune = quarantine & (age == self._contagion_delay)
+        quarantine_hospitalized = bernoulli(quarantine & ~quarantine_immune & (age == self._hospitalized_delay),
+                                            self._hospitalized_rate, rng)
+
+        # Hospitalized : death, then recovery
+        hospitalized_deceased = hospitalized & (age == self._death_delay)
+        if hospitalized_deceased.any():
+            hospitalized_deceased = bernoulli(hospitalized_deceased, self._death_rate / self._hospitalized_rate,
+                                              rng)
+        hospitalized_immune = hospitalized & ~hospitalized_deceased & (age == self._contagion_delay)
+
+        # Infected : diagnosis, then hospitalization, then recovery. The remaining ones are contagious
+        infected_quarantine = bernoulli(infected & (age == self._diagnosis_delay), self._quarantine_rate,
+                                        rng)
+        contagious = infected & ~infected_quarantine
+        infected_hospitalized = bernoulli(contagious & (age == self._hospitalized_delay),
+                                          self._hospitalized_rate, rng)
+        contagious &= ~infected_hospitalized
+        infected_immune = contagious & (age == self._contagion_delay)
+        contagious &= ~infected_immune
+
+        next_states[quarantine_immune | hospitalized_immune | infected_immune] = STATE["IMMUNE"]
+        next_states[quarantine_hospitalized | infected_hospitalized] = STATE["HOSPITALIZED"]
+        next_states[hospitalized_deceased] = STATE["DECEASED"]
+        next_states[infected_quarantine] = STATE["QUARANTINE"]
+
+        return next_states, contagious
+
+    def _today(self) -> int:
+        """
+        Get the contamination date of the current round, moving the origin of the dates forward when it is too far
+
+        :return: current round, relative to the origin of the contamination dates
+        """
+        today = self._current_round - self._date_origin
+        if today > DATE_SPAN:
+            # Les dates restent dans [-DATE_SPAN, DATE_SPAN], les âges dans les valeurs du type
+            dates = self._contamination_dates
+            dates -= today
+            np.maximum(dates, -DATE_SPAN, out=dates)
+            self._date_origin = self._current_round
+            today = 0
+
+        return today
+
+    def _count_changes(self, old_states: np.ndarray, new_states: np.ndarray) -> None:
+        """
+        Update the counters of the current round with state changes
+
+        Susceptible people are not counted : a contamination only increases the infected counter.
+
+        :param old_states: states of the changed cells before the round
+        :param new_states: states of the changed cells after the round
+        """
+        delta = np.bincount(new_states, minlength=len(STATE)) - np.bincount(old_states, minlength=len(STATE))
+        delta[STATE["SUSCEPTIBLE"]] = 0
+        self._counter[self._current_round + 1] += delta
+
+    def _grow_counter(self) -> None:
+        """
+        Make room in the counters for the next round, doubling their capacity when full
+        """
+        if self._current_round + 1 < self._counter.shape[0]:
+            return
+
+        counter = np.zeros((2 * self._counter.shape[0],) + self._counter.shape[1:], dtype=self._counter.dtype)
+        counter[:self._counter.shape[0]] = self._counter
+        self._counter = counter
 
     def last_board(self) -> BoardState:
-        return self._state_db[-1]
+        """
+        Get the current board, without copying it
+
+        :return: current round state, updated in place by the following rounds
+        """
+        return self._board
+
+    def board_copy(self) -> BoardState:
+        """
+        Get a copy of the current board, to keep it across rounds
+
+        :return: current round state, that the following rounds leave unchanged
+        """
+        return BoardState(np.array(self._board))
+
+    def state_data(self, state: str) -> np.ndarray:
+        """
+        Get the counter of a state, for every round
+
+        :param state: state name, as in STATE
+        :return: counter values, indexed by round, as a view on the counters
+        """
+        return self._counter[:self._current_round + 1, STATE[state]]
+
+    def _checkpoint_metadata(self) -> Dict[str, Any]:
+        """
+        :return: simulation state saved as JSON by save_checkpoint
+        """
+        return {
+            "checkpoint_version": CHECKPOINT_VERSION,
+            "model_version": MODEL_VERSION,
+            "length": self._length,
+            "width": self._width,
+            "current_round": self._current_round,
+            "date_origin": self._date_origin,
+            "seed": self._seed if isinstance(self._seed, int) else None,
+            "rng_state": self._rng.bit_generator.state,
+            "parameters": {name: getattr(self, name) for name in board_parameters()},
+            "last_changes": self._last_changes is not None,
+            "active_round": self._active_round,
+            "scheduler_round": self._scheduler_round,
+            "scheduled_delays": list(self._scheduled_delays),
+            "network": self._network is not None,
+            "network_weights": self._network is not None and self._network.weights is not None,
+            "kernel": self._kernel is not None,
+            "immunity_map": self._immunity_map is not None,
+            "cluster_cells": self._cluster_cells is not None,
+            "stripe_rng_states": None if self._stripe_rngs is None else [rng.bit_generator.state
+                                                                         for rng in self._stripe_rngs],
+        }
+
+    def save_checkpoint(self, file: str, compress: bool = False) -> None:
+        """
+        Save the full simulation state, so that load_checkpoint can resume the run exactly where it stopped
+
+        The checkpoint is a .npz file : the board, contamination dates, counters, engine state and contact network
+        as binary arrays, the parameters, round and random generator state as JSON. The round history is not saved.
+
+        :param file: checkpoint file path
+        :param compress: compress the arrays (smaller file, slower to write and load)
+        """
+        index, states = np.empty(0, dtype=np.intp), np.empty(0, dtype=STATE_DTYPE)
+        if self._last_changes is not None:
+            index, states = self._last_changes
+        scheduled_cells, scheduled_rounds = self._scheduler.pending()
+        metadata = self._checkpoint_metadata()
+
+        # Tableaux facultatifs, tous des np.ndarray : Any évite de les confondre avec les options de np.savez
+        optional: Dict[str, Any] = {}
+        if self._network is not None:
+            optional = {"network_indptr": self._network.indptr, "network_indices": self._network.indices}
+            if self._network.weights is not None:
+                optional["network_weights"] = self._network.weights
+        if self._kernel is not None:
+            optional["kernel"] = self._kernel
+        if self._immunity_map is not None:
+            optional["immunity_map"] = self._immunity_map
+        if self._cluster_cells is not None:
+            optional["cluster_cells"] = self._cluster_cells
+
+        save = np.savez_compressed if compress else np.savez
+        save(file, metadata=np.array(json.dumps(metadata)), board=self._board,
+             contamination_dates=self._contamination_dates, counters=self._counter[:self._current_round + 1],
+             last_index=index, last_states=states, active=self._active, scheduled_cells=scheduled_cells,
+             scheduled_rounds=scheduled_rounds, **optional)
+
+    def _load_checkpoint(self, metadata: Dict[str, Any], arrays: Any) -> None:
+        """
+        Restore the simulation state saved by save_checkpoint
+
+        :param metadata: checkpoint metadata
+        :param arrays: checkpoint arrays, by name
+        """
+        for name, value in metadata["parameters"].items():
+            setattr(self, name, value)
+
+        self._current_round = metadata["current_round"]
+        self._board[...] = arrays["board"]
+        dates = arrays["contamination_dates"]
+        self._date_origin = metadata.get("date_origin", 0)
+        if dates.dtype != DATE_DTYPE:
+            # Point de reprise aux dates absolues
+            self._date_origin = self._current_round
+            dates = np.maximum(dates - self._current_round, -DATE_SPAN)
+        self._contamination_dates[...] = dates
+        counters = arrays["counters"]
+        self._counter = np.zeros((max(COUNTER_CAPACITY, 2 * (self._current_round + 1)),) + counters.shape[1:],
+                                 dtype=np.int64)
+        self._counter[:self._current_round + 1] = counters
+        self._last_changes = (arrays["last_index"], arrays["last_states"]) if metadata["last_changes"] else None
+        self._rng.bit_generator.state = metadata["rng_state"]
+
+        self._active = arrays["active"]
+        self._active_round = metadata["active_round"]
+        self._scheduler.clear()
+        self._scheduler.schedule(arrays["scheduled_cells"], arrays["scheduled_rounds"])
+        self._scheduler_round = metadata["scheduler_round"]
+        self._scheduled_delays = tuple(metadata["scheduled_delays"])
+
+        self._network = None
+        if metadata["network"]:
+            self._network = ContactNetwork(arrays["network_indptr"], arrays["network_indices"],
+                                           arrays["network_weights"] if metadata["network_weights"] else None)
+
+        self._kernel = arrays["kernel"] if metadata.get("kernel") else None
+        self._immunity_map = arrays["immunity_map"] if metadata.get("immunity_map") else None
+        self._cluster_cells = arrays["cluster_cells"] if metadata.get("cluster_cells") else None
+
+        self._stripe_rngs = None
+        if metadata["stripe_rng_states"] is not None:
+            self._stripe_rngs = []
+            for rng_state in metadata["stripe_rng_states"]:
+                rng = copy.deepcopy(self._rng)
+                rng.bit_generator.state = rng_state
+                self._stripe_rngs.append(rng)
+
+        self._state_db.clear()
+        self._state_db.append(self._current_round, self._board)
+
+    def fork(self, history: Optional[BoardHistory] = None) -> "DiseaseBoard":
+        """
+        Copy the board with its full simulation state, to go on with other parameters from the current round
+
+        The copy and the original board then run independently. They start with the same random generator state :
+        with the same parameters, they compute the same rounds. The copy is kept in memory, even if the board is
+        memory-mapped.
+
+        :param history: round history of the copy, that starts at the current round
+        :return: copy of the board
+        """
+        # Copie des attributs sans passer par __getstate__, qui encoderait le plateau
+        board = object.__new__(type(self))
+        board.__dict__.update(self.__dict__)
+        board._storage = None
+        board._board = BoardState(np.array(self._board))
+        board._contamination_dates = np.array(self._contamination_dates)
+        board._counter = self._counter.copy()
+        board._rng = copy.deepcopy(self._rng)
+        board._active = self._active.copy()
+        board._scheduler = copy.deepcopy(self._scheduler)
+        board._stripe_rngs = copy.deepcopy(self._stripe_rngs)
+        if self._last_changes is not None:
+            board._last_changes = (self._last_changes[0].copy(), self._last_changes[1].copy())
+
+        board._state_db = history if history is not None else DeltaHistory()
+        board._state_db.clear()
+        board._state_db.append(self._current_round, board._board)
+
+        return board
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Pickle the board as an encoded snapshot and the contamination dates compressed by zlib, several times
+        smaller, when they are sent to another process
+
+        :return: attributes of the board
+        """
+        dates = np.ascontiguousarray(self._contamination_dates)
+        state = self.__dict__.copy()
+        state["_board"] = encode_board(self._board, CODEC_ZLIB)
+        state["_contamination_dates"] = (dates.shape, dates.dtype.str, zlib.compress(dates.tobytes(), ZLIB_LEVEL))
+        state["_storage"] = None
+        state["_grid_network"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._board = BoardState(decode_board(state["_board"]))
+        shape, dtype, dates = state["_contamination_dates"]
+        self._contamination_dates = np.frombuffer(bytearray(zlib.decompress(dates)), dtype=dtype).reshape(shape)
+
+    def board_at(self, round_nbr: int) -> BoardState:
+        """
+        Get the board of a past round, as kept by the history
+
+        :param round_nbr: round of the board
+        :return: board state, a copy that the caller may modify
+        """
+        if round_nbr == self._current_round:
+            return self.board_copy()
+
+        return BoardState(self._state_db.board_at(round_nbr))
+
+
+def board_parameters() -> List[str]:
+    """
+    Get the DiseaseBoard parameters that can be set by name (command line, config files...)
+
+    :return: names of the DiseaseBoard properties that have a setter and a number or string value
+    """
+    properties = [(name, attr) for name, attr in vars(DiseaseBoard).items() if isinstance(attr, property)]
+    return sorted(name for name, attr in properties
+                  if attr.fset and attr.fget.__annotations__.get("return") in (int, float, str))
+
+
+def parameter_value(name: str, value: Any) -> Any:
+    """
+    Convert the value of a DiseaseBoard parameter to the type returned by its property
+
+    :param name: property name
+    :param value: value, possibly a string or a numpy scalar
+    :return: converted value
+    """
+    if name not in board_parameters():
+        raise ValueError("Unknown parameter %r, expected one of %s" % (name, ", ".join(board_parameters())))
+
+    value_type = vars(DiseaseBoard)[name].fget.__annotations__.get("return")
+    if value_type in (int, float, str):
+        value = value_type(value)
+    return value
+
+
+def set_parameter(board: DiseaseBoard, name: str, value: Any) -> None:
+    """
+    Set a DiseaseBoard parameter, converted to the type returned by its property
+
+    :param board: board to configure
+    :param name: property name
+    :param value: new value, possibly a string
+    """
+    setattr(board, name, parameter_value(name, value))
+
+
+def configured_board(size: BoardSize, cluster_nbr: int, parameters: Optional[Dict[str, Any]] = None,
+                     engine: str = ENGINE_LOOP, history: Optional[BoardHistory] = None,
+                     seed: Seed = None, storage: Optional[str] = None) -> DiseaseBoard:
+    """
+    Create a board and set its parameters by name
+
+    The initial population is drawn again if a parameter it depends on (immunity rate, cluster number) is set.
+
+    :param size: side of a square board, or (length, width)
+    :param cluster_nbr: number of initial disease clusters
+    :param parameters: DiseaseBoard parameters, by property name
+    :param engine: simulation engine
+    :param history: round history
+    :param seed: seed of the board random generator
+    :param storage: directory of the memory-mapped board (None to keep it in memory)
+    :return: configured board, at round 0
+    """
+    board = DiseaseBoard(size, cluster_nbr, engine, history, seed, storage)
+    parameters = parameters or {}
+    for name, value in parameters.items():
+        set_parameter(board, name, value)
+
+    if "immunity_rate" in parameters or "cluster_nbr" in parameters:
+        board.reset()
+
+    return board
+
+
+def read_checkpoint(file: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Read a checkpoint file written by save_checkpoint
+
+    :param file: checkpoint file path
+    :return: checkpoint metadata, checkpoint arrays by name
+    """
+    with np.load(file, allow_pickle=False) as arrays:
+        metadata = json.loads(str(arrays["metadata"]))
+        if metadata["checkpoint_version"] != CHECKPOINT_VERSION:
+            raise ValueError("Unsupported checkpoint version %r" % metadata["checkpoint_version"])
+
+        return metadata, {name: arrays[name] for name in arrays.files}
+
+
+def load_checkpoint(file: str, history: Optional[BoardHistory] = None, storage: Optional[str] = None) -> DiseaseBoard:
+    """
+    Load a board saved by save_checkpoint : the following rounds are the same as if the run had not been stopped
+
+    :param file: checkpoint file path
+    :param history: round history, that starts at the checkpoint round
+    :param storage: directory of the memory-mapped board (None to keep it in memory)
+    :return: board, at the checkpoint round
+    """
+    metadata, arrays = read_checkpoint(file)
+    if metadata.get("replica_nbr") is not None:
+        raise ValueError("%s is a checkpoint of replicas, that BatchedBoard.load_checkpoint loads" % file)
+
+    parameters = metadata["parameters"]
+    board = DiseaseBoard((metadata["length"], metadata["width"]), parameters["cluster_nbr"], parameters["engine"],
+                         history, metadata["seed"], storage)
+    board._load_checkpoint(metadata, arrays)
+    return board
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from BoardHistory import LatestHistory
+from DiseaseBoard import BoardSize, STATE, ENGINE_FRONTIER, configured_board
+
+# Quantile de la loi normale pour les intervalles de confiance à 95%
+Z_95 = 1.959963984540054
+
+
+class EnsembleResult:
+    """
+    Counters of the replicas of an ensemble, stored as a (replica, round, state) array
+
+    Every statistic is computed for one state, given by its name as in STATE.
+    """
+
+    def __init__(self, counters: np.ndarray) -> None:
+        self._counters: np.ndarray = counters
+
+    @property
+    def counters(self) -> np.ndarray:
+        return self._counters
+
+    @property
+    def replica_nbr(self) -> int:
+        return self._counters.shape[0]
+
+    @property
+    def round_nbr(self) -> int:
+        return self._counters.shape[1] - 1
+
+    def data(self, state: str) -> np.ndarray:
+        """
+        :param state: state name
+        :return: (replica, round) counters of the state
+        """
+        return self._counters[:, :, STATE[state]]
+
+    def mean(self, state: str) -> np.ndarray:
+        """
+        :param state: state name
+        :return: mean counter of the state, for every round
+        """
+        return self.data(state).mean(axis=0)
+
+    def quantiles(self, state: str, q: Sequence[float] = (0.05, 0.5, 0.95)) -> np.ndarray:
+        """
+        :param state: state name
+        :param q: quantiles to compute, between 0 and 1
+        :return: (quantile, round) quantiles of the counter of the state
+        """
+        return np.quantile(self.data(state), q, axis=0)
+
+    def confidence_band(self, state: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        95% confidence band of the mean counter of a state, for every round (normal approximation)
+
+        :param state: state name
+        :return: lower bound, upper bound
+        """
+        data = self.data(state)
+        mean = data.mean(axis=0)
+        if self.replica_nbr < 2:
+            return mean, mean
+
+        half_width = Z_95 * data.std(axis=0, ddof=1) / np.sqrt(self.replica_nbr)
+        return mean - half_width, mean + half_width
+
+    def final(self, state: str) -> np.ndarray:
+        """
+        :param state: state name
+        :return: counter of the state at the last round, for every replica
+        """
+        return self.data(state)[:, -1]
+
+    def peak(self, state: str) -> np.ndarray:
+        """
+        :param state: state name
+        :return: maximum counter of the state over the rounds, for every replica
+        """
+        return self.data(state).max(axis=1)
+
+
+def run_replica(size: BoardSize, cluster_nbr: int, round_nbr: int, parameters: Optional[Dict[str, Any]], engine: str,
+                seed: np.random.SeedSequence) -> np.ndarray:
+    """
+    Run one replica, with its own random stream
+
+    :param size: side of a square board, or (length, width)
+    :param cluster_nbr: number of initial disease clusters
+    :param round_nbr: number of rounds to simulate
+    :param parameters: DiseaseBoard parameters, by property name
+    :param engine: simulation engine
+    :param seed: seed of the replica random stream
+    :return: (round, state) counters of the replica
+    """
+    board = configured_board(size, cluster_nbr, parameters, engine, LatestHistory(), seed)
+    for _ in range(round_nbr):
+        board.next_round()
+
+    return board.counters.copy()
+
+
+def _run_replica(args: Tuple) -> np.ndarray:
+    return run_replica(*args)
+
+
+def run_ensemble(replica_nbr: int, round_nbr: int, size: BoardSize, cluster_nbr: int,
+                 parameters: Optional[Dict[str, Any]] = None, engine: str = ENGINE_FRONTIER,
+                 seed: Optional[int] = None, processes: Optional[int] = None) -> EnsembleResult:
+    """
+    Run independent replicas of a simulation on a process pool
+
+    Each replica gets its own random stream, spawned from seed : the same seed gives the same result, whatever the
+    number of processes.
+
+    :param replica_nbr: number of replicas
+    :param round_nbr: number of rounds to simulate
+    :param size: side of a square board, or (length, width)
+    :param cluster_nbr: number of initial disease clusters
+    :param parameters: DiseaseBoard parameters, by property name
+    :param engine: simulation engine
+    :param seed: ensemble seed (None for a random one)
+    :param processes: number of worker processes (None for one per core, 1 to run in the current process)
+    :return: counters of all the replicas
+    """
+    seeds = np.random.SeedSequence(seed).spawn(replica_nbr)
+    tasks = [(size, cluster_nbr, round_nbr, parameters, engine, replica_seed) for replica_seed in seeds]
+
+    return EnsembleResult(np.stack(list(map_replicas(tasks, processes))))
+
+
+def map_replicas(tasks: List[Tuple], processes: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Run replicas on a process pool
+
+    :param tasks: arguments of run_replica, for every replica
+    :param processes: number of worker processes (None for one per core, 1 to run in the current process)
+    :return: counters of every replica, in the order of the tasks, as soon as they are available
+    """
+    return map_tasks(_run_replica, tasks, processes)
+
+
+def map_tasks(function: Callable[[Tuple], Any], tasks: List[Tuple], processes: Optional[int] = None) -> Iterator:
+    """
+    Call a function for every task on a process pool
+
+    :param function: module level function, called with the arguments of one task as a tuple
+    :param tasks: arguments of every task
+    :param processes: number of worker processes (None for one per core, 1 to run in the current process)
+    :return: results of every task, in the order of the tasks, as soon as they are available
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+
+    if processes <= 1:
+        yield from map(function, tasks)
+        return
+
+    # Des paquets de tâches, pour limiter les échanges entre processus
+    chunksize = max(1, len(tasks) // (4 * processes))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        yield from executor.map(function, tasks, chunksize=chunksize)
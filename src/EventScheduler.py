@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+class EventScheduler:
+    """
+    Bucket queue of the cells due for a state transition check, indexed by round
+
+    Every transition of the model happens a fixed delay after the contamination of a cell. When a cell is infected,
+    the rounds of its future checks are booked once, so that each round only looks at the cells due that round.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: Dict[int, List[np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return sum(cells.size for bucket in self._buckets.values() for cells in bucket)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+
+    def schedule(self, cells: np.ndarray, rounds: np.ndarray) -> None:
+        """
+        Book a check of each cell at the given round
+
+        :param cells: flat index of the cells
+        :param rounds: round of the check of each cell
+        """
+        if cells.size == 0:
+            return
+
+        # Cas courant : les cases contaminées au même tour ont leurs contrôles au même tour
+        if rounds[0] == rounds[-1] and (rounds == rounds[0]).all():
+            self._buckets.setdefault(int(rounds[0]), []).append(cells)
+            return
+
+        order = np.argsort(rounds, kind="stable")
+        cells, rounds = cells[order], rounds[order]
+        due_rounds, starts = np.unique(rounds, return_index=True)
+        for due_round, due_cells in zip(due_rounds, np.split(cells, starts[1:])):
+            self._buckets.setdefault(int(due_round), []).append(due_cells)
+
+    def schedule_contaminations(self, cells: np.ndarray, dates: np.ndarray, delays: Iterable[int],
+                                from_round: int) -> None:
+        """
+        Book the checks of contaminated cells, one for each delay after their contamination date
+
+        :param cells: flat index of the cells
+        :param dates: contamination date of each cell
+        :param delays: transition delays of the model
+        :param from_round: first round that can be booked, earlier checks are dropped
+        """
+        for delay in sorted(set(delays)):
+            if delay < 1:
+                continue
+            rounds = dates + delay
+            kept = rounds >= from_round
+            self.schedule(cells[kept], rounds[kept])
+
+    def pending(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get every booked check, for instance to save them and book them again with schedule
+
+        :return: flat index of the cells, round of the check of each cell
+        """
+        if not self._buckets:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
+
+        cells = [np.concatenate(bucket) for bucket in self._buckets.values()]
+        rounds = [np.full(bucket_cells.size, due_round, dtype=np.int64)
+                  for due_round, bucket_cells in zip(self._buckets, cells)]
+        return np.concatenate(cells), np.concatenate(rounds)
+
+    def pop(self, round_nbr: int) -> np.ndarray:
+        """
+        Remove and return the cells due at a round
+
+        :param round_nbr: round of the checks
+        :return: flat index of the due cells, sorted
+        """
+        bucket = self._buckets.pop(round_nbr, [])
+        if not bucket:
+            return np.empty(0, dtype=np.intp)
+
+        # Une case n'est réservée qu'une fois par tour (les délais sont dédoublonnés) : un tri suffit
+        return np.sort(np.concatenate(bucket))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Bords du plateau : les cases extérieures n'existent pas, ou le plateau est replié sur lui-même (tore)
+BOUNDARY_CLIPPED = "clipped"
+BOUNDARY_PERIODIC = "periodic"
+BOUNDARIES = (BOUNDARY_CLIPPED, BOUNDARY_PERIODIC)
+
+# Au-delà de ce nombre de coefficients non nuls, un noyau non séparable est appliqué par FFT
+DIRECT_TAP_NBR = 25
+
+# Erreur d'arrondi de la FFT : en deçà, une case n'a aucun voisin contagieux
+FFT_TOLERANCE = 1e-9
+
+
+def moore_kernel(radius: int = 1) -> np.ndarray:
+    """
+    :param radius: distance of the farthest neighbours, in cells
+    :return: kernel of weight 1 on every cell of the (2 radius + 1) square around a cell, but the cell itself
+    """
+    kernel = np.ones((2 * radius + 1, 2 * radius + 1))
+    kernel[radius, radius] = 0
+    return kernel
+
+
+def gaussian_kernel(radius: int, sigma: float) -> np.ndarray:
+    """
+    :param radius: distance of the farthest neighbours, in cells
+    :param sigma: decay distance, in cells
+    :return: kernel whose weight decreases as exp(-d² / 2 sigma²) with the distance d to the cell, but the cell itself
+    """
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-(offsets[:, None] ** 2 + offsets[None, :] ** 2) / (2 * sigma ** 2))
+    kernel[radius, radius] = 0
+    return kernel
+
+
+def check_kernel(kernel: np.ndarray) -> None:
+    """
+    :param kernel: kernel to check, raises ValueError if it is not a square with a central cell
+    """
+    if kernel.ndim != 2 or kernel.shape[0] != kernel.shape[1] or kernel.shape[0] % 2 == 0:
+        raise ValueError("A kernel must be a square of odd size, got shape %s" % (kernel.shape,))
+    if (kernel < 0).any():
+        raise ValueError("Kernel weights must not be negative")
+
+
+def neighbour_sum(mask: np.ndarray, kernel: np.ndarray, boundary: str = BOUNDARY_CLIPPED) -> np.ndarray:
+    """
+    Sum, for every cell, the kernel weights of its neighbours set in mask : out[x, y] = sum(kernel[r + dx, r + dy] *
+    mask[x + dx, y + dy]) on the last two axes
+
+    Small kernels are applied as shifted sums, and the other ones by FFT, so that the cost of large kernels does not
+    grow with their area. The kernels of the model are not separable : the weight of the cell itself is 0, and the
+    log escape weights are not a product of a column and a line.
+
+    :param mask: board, or stack of boards along the first axes
+    :param kernel: square kernel of odd size
+    :param boundary: one of BOUNDARIES
+    :return: weighted neighbour sums
+    """
+    radius = kernel.shape[0] // 2
+    length, width = mask.shape[-2:]
+    mask = mask.astype(float)
+
+    taps = np.argwhere(kernel != 0)
+    if len(taps) <= DIRECT_TAP_NBR:
+        pad_width = [(0, 0)] * (mask.ndim - 2) + [(radius, radius), (radius, radius)]
+        padded = np.pad(mask, pad_width, mode="wrap" if boundary == BOUNDARY_PERIODIC else "constant")
+        total = np.zeros(mask.shape)
+        for dx, dy in taps:
+            total += kernel[dx, dy] * padded[..., dx:dx + length, dy:dy + width]
+        return total
+
+    # Corrélation par FFT : convolution par le noyau retourné
+    if boundary == BOUNDARY_PERIODIC:
+        wrapped = np.zeros((length, width))
+        dx, dy = np.meshgrid(np.arange(-radius, radius + 1), np.arange(-radius, radius + 1), indexing="ij")
+        np.add.at(wrapped, ((-dx) % length, (-dy) % width), kernel)
+        return np.fft.irfft2(np.fft.rfft2(mask) * np.fft.rfft2(wrapped), s=(length, width))
+
+    shape = (length + 2 * radius, width + 2 * radius)
+    full = np.fft.irfft2(np.fft.rfft2(mask, s=shape) * np.fft.rfft2(kernel[::-1, ::-1], s=shape), s=shape)
+    return full[..., radius:radius + length, radius:radius + width]
+
+
+def contamination_log_escape(contagious: np.ndarray, kernel: np.ndarray, contagion_rate: float,
+                             boundary: str = BOUNDARY_CLIPPED) -> np.ndarray:
+    """
+    Logarithm of the probability that every cell escapes all its contagious neighbours : the sum of log(1 - p k)
+    over the contagious neighbours, p being the contagion rate and k the kernel weight of the neighbour
+
+    :param contagious: boolean board of the contagious cells, or stack of boards along the first axes
+    :param kernel: square kernel of odd size
+    :param contagion_rate: contagion rate
+    :param boundary: one of BOUNDARIES
+    :return: log escape probability of every cell, 0 for the cells without contagious neighbour
+    """
+    with np.errstate(divide="ignore"):
+        log_kernel = np.log1p(-np.minimum(contagion_rate * kernel, 1))
+    # Un contact certain (p k = 1) reste une très forte contagion, et pas un infini qui fausserait la FFT
+    log_kernel = np.maximum(log_kernel, np.log(np.finfo(float).tiny))
+
+    log_escape = neighbour_sum(contagious, log_kernel, boundary)
+    log_escape[log_escape > -FFT_TOLERANCE] = 0
+    return log_escape
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from BoardHistory import STATE_DTYPE
+from DiseaseBoard import DiseaseBoard, STATE_NAMES, MODEL_VERSION, board_parameters
+
+# Format des plateaux enregistrés : copie complète, ou différences entre tours
+RUN_FORMAT_FRAMES = "frames"
+RUN_FORMAT_DELTA = "delta"
+RUN_FORMATS = (RUN_FORMAT_FRAMES, RUN_FORMAT_DELTA)
+
+# Version du format des fichiers, à changer si leur contenu change
+RUN_FORMAT_VERSION = 1
+
+METADATA_FILE = "run.json"
+BOARDS_FILE = "boards.u8"
+CHANGES_INDEX_FILE = "changes_index.bin"
+CHANGES_STATES_FILE = "changes_states.u8"
+CHANGES_OFFSETS_FILE = "changes_offsets.i64"
+COUNTER_DTYPE = np.int64
+
+
+def counter_file(state: str) -> str:
+    """
+    :param state: state name, as in STATE
+    :return: name of the file of the counter of the state
+    """
+    return state.lower() + ".i64"
+
+
+class RunWriter:
+    """
+    Streams the rounds of a simulation to a directory, as they are computed
+
+    Every file is only appended to, so that memory does not grow with the number of rounds :
+    - boards.u8 : raw uint8 boards, one after the other, that can be memory-mapped. With the frames format, the boards
+      of the rounds that are a multiple of step; with the delta format, keyframes every keyframe_interval rounds
+    - changes_index.bin, changes_states.u8, changes_offsets.i64 (delta format only) : the flat index and new state of
+      the cells changed by each round, and the end offset of each round in these two files
+    - <state>.i64 : one column file per state counter, one value per round
+    - run.json : board shape, format and parameters of the run
+    """
+
+    def __init__(self, directory: str, board: DiseaseBoard, board_format: str = RUN_FORMAT_DELTA, step: int = 1,
+                 keyframe_interval: int = 100) -> None:
+        """
+        Create the run files and write the current round of the board
+
+        :param directory: run directory, created if needed
+        :param board: simulated board
+        :param board_format: board format, one of RUN_FORMATS
+        :param step: frames format, only write the boards of the rounds that are a multiple of step
+        :param keyframe_interval: delta format, write a full board every keyframe_interval rounds
+        """
+        if board_format not in RUN_FORMATS:
+            raise ValueError("Unknown format %r, expected one of %s" % (board_format, ", ".join(RUN_FORMATS)))
+        if step < 1:
+            raise ValueError("step must be a positive number, got %d" % step)
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be a positive number, got %d" % keyframe_interval)
+
+        self._directory: str = directory
+        self._board: DiseaseBoard = board
+        self._format: str = board_format
+        self._step: int = step
+        self._keyframe_interval: int = keyframe_interval
+        self._first_round: int = board.current_round
+        self._last_round: int = board.current_round - 1
+
+        bs = board.last_board()
+        self._index_dtype = np.uint32 if bs.size <= np.iinfo(np.uint32).max else np.int64
+        self._changes_end: int = 0
+
+        os.makedirs(directory, exist_ok=True)
+        metadata = {
+            "format_version": RUN_FORMAT_VERSION,
+            "model_version": MODEL_VERSION,
+            "format": board_format,
+            "shape": list(bs.shape),
+            "first_round": self._first_round,
+            "step": step,
+            "keyframe_interval": keyframe_interval,
+            "index_dtype": np.dtype(self._index_dtype).name,
+            "seed": board.seed if isinstance(board.seed, int) else None,
+            "parameters": {name: getattr(board, name) for name in board_parameters()},
+        }
+        with open(os.path.join(directory, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=4)
+
+        self._files: Dict[str, BinaryIO] = {}
+        names = [BOARDS_FILE] + [counter_file(state) for state in STATE_NAMES]
+        if board_format == RUN_FORMAT_DELTA:
+            names += [CHANGES_INDEX_FILE, CHANGES_STATES_FILE, CHANGES_OFFSETS_FILE]
+        for name in names:
+            self._files[name] = open(os.path.join(directory, name), "wb")
+
+        self.write_round()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def __enter__(self) -> "RunWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write_round(self) -> None:
+        """
+        Append the current round of the board, that must follow the last written round
+        """
+        round_nbr = self._board.current_round
+        if round_nbr != self._last_round + 1:
+            raise ValueError("Round %d does not follow the last written round %d" % (round_nbr, self._last_round))
+
+        bs = self._board.last_board()
+        relative_round = round_nbr - self._first_round
+        if self._format == RUN_FORMAT_FRAMES:
+            if round_nbr % self._step == 0:
+                self._files[BOARDS_FILE].write(bs.astype(STATE_DTYPE, copy=False).tobytes())
+        else:
+            if relative_round > 0:
+                changes = self._board.last_changes
+                if changes is None:
+                    raise ValueError("The changes of round %d are not known" % round_nbr)
+                index, states = changes
+                self._files[CHANGES_INDEX_FILE].write(index.astype(self._index_dtype).tobytes())
+                self._files[CHANGES_STATES_FILE].write(states.astype(STATE_DTYPE).tobytes())
+                self._changes_end += index.size
+                self._files[CHANGES_OFFSETS_FILE].write(np.int64(self._changes_end).tobytes())
+            if relative_round % self._keyframe_interval == 0:
+                self._files[BOARDS_FILE].write(bs.astype(STATE_DTYPE, copy=False).tobytes())
+
+        for state, value in zip(STATE_NAMES, self._board.counters[-1]):
+            self._files[counter_file(state)].write(COUNTER_DTYPE(value).tobytes())
+
+        self._last_round = round_nbr
+
+    def flush(self) -> None:
+        for f in self._files.values():
+            f.flush()
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+class RunReader:
+    """
+    Reads a run written by RunWriter, without simulating it again
+
+    Boards and counters are memory-mapped : only the rounds that are read are loaded. A run whose writing was
+    interrupted can be read up to its last complete round.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        :param directory: run directory
+        """
+        self._directory: str = directory
+        with open(os.path.join(directory, METADATA_FILE)) as f:
+            self._metadata: Dict[str, Any] = json.load(f)
+
+        if self._metadata["format_version"] != RUN_FORMAT_VERSION:
+            raise ValueError("Unsupported run format version %r" % self._metadata["format_version"])
+
+        self._shape: Tuple[int, int] = tuple(self._metadata["shape"])  # type: ignore
+        self._first_round: int = self._metadata["first_round"]
+
+        self._counters: Dict[str, np.ndarray] = {state: self._map(counter_file(state), COUNTER_DTYPE)
+                                                 for state in STATE_NAMES}
+        self._boards: np.ndarray = self._map(BOARDS_FILE, STATE_DTYPE, self._shape)
+
+        round_count = min(counter.size for counter in self._counters.values())
+        if self.format == RUN_FORMAT_DELTA:
+            self._index = self._map(CHANGES_INDEX_FILE, np.dtype(self._metadata["index_dtype"]))
+            self._states = self._map(CHANGES_STATES_FILE, STATE_DTYPE)
+            self._offsets = self._map(CHANGES_OFFSETS_FILE, np.int64)
+            complete = np.flatnonzero(self._offsets <= min(self._index.size, self._states.size))
+            round_count = min(round_count, complete.size + 1)
+        self._round_count: int = round_count
+
+        # Dernier plateau reconstruit, pour avancer tour par tour sans repartir d'une keyframe
+        self._cursor: Optional[Tuple[int, np.ndarray]] = None
+
+    def _map(self, name: str, dtype, shape: Tuple[int, ...] = ()) -> np.ndarray:
+        """
+        Memory-map a run file, without its incomplete last record
+
+        :param name: file name
+        :param dtype: type of the values
+        :param shape: shape of a record (scalar values by default)
+        :return: (record, ...) read-only array
+        """
+        path = os.path.join(self._directory, name)
+        record_size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        count = os.path.getsize(path) // record_size
+        if count == 0:
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,) + shape)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self._metadata
+
+    @property
+    def format(self) -> str:
+        return self._metadata["format"]
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._shape
+
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return self._metadata["parameters"]
+
+    @property
+    def first_round(self) -> int:
+        return self._first_round
+
+    @property
+    def last_round(self) -> int:
+        return self._first_round + self._round_count - 1
+
+    @property
+    def rounds(self) -> List[int]:
+        """
+        :return: rounds whose board can be read
+        """
+        rounds = range(self._first_round, self.last_round + 1)
+        if self.format == RUN_FORMAT_FRAMES:
+            return [round_nbr for round_nbr in rounds if round_nbr % self._metadata["step"] == 0]
+        return list(rounds)
+
+    @property
+    def counters(self) -> np.ndarray:
+        """
+        :return: (round, state) counters, from the first round of the run
+        """
+        return np.column_stack([self.state_data(state) for state in STATE_NAMES])
+
+    def state_data(self, state: str) -> np.ndarray:
+        """
+        :param state: state name, as in STATE
+        :return: counter values, from the first round of the run, as a memory-mapped array
+        """
+        return self._counters[state][:self._round_count]
+
+    def board_at(self, round_nbr: int) -> np.ndarray:
+        """
+        Read the board of a round: frames are memory-mapped, delta boards are rebuilt from the closest keyframe
+
+        :param round_nbr: round of the board
+        :return: board state
+        """
+        if round_nbr not in range(self._first_round, self.last_round + 1):
+            raise KeyError("Round %d is not in the run" % round_nbr)
+
+        if self.format == RUN_FORMAT_FRAMES:
+            step = self._metadata["step"]
+            if round_nbr % step != 0:
+                raise KeyError("Round %d is not kept in the run" % round_nbr)
+            first_stored = -(-self._first_round // step) * step
+            return self._boards[(round_nbr - first_stored) // step]
+
+        relative_round = round_nbr - self._first_round
+        keyframe = relative_round // self._metadata["keyframe_interval"]
+        start = keyframe * self._metadata["keyframe_interval"]
+        if self._cursor is not None and start <= self._cursor[0] <= relative_round:
+            start, board = self._cursor
+            board = board.copy()
+        else:
+            board = np.array(self._boards[keyframe])
+
+        # Changements des tours start + 1 à relative_round : seul le dernier état de chaque case compte
+        begin = self._offsets[start - 1] if start > 0 else 0
+        end = self._offsets[relative_round - 1] if relative_round > 0 else 0
+        index = np.asarray(self._index[begin:end])[::-1]
+        index, last = np.unique(index, return_index=True)
+        board.ravel()[index] = np.asarray(self._states[begin:end])[::-1][last]
+
+        self._cursor = (relative_round, board)
+        return board.copy()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Plateaux initiaux structurés : cartes d'immunité et emplacements des clusters, lus depuis des fichiers
+
+import os
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+# Champ de l'en-tête d'une image netpbm, précédé de blancs ou de commentaires
+NETPBM_TOKEN = re.compile(rb"(?:\s|#[^\n]*\n)*(\S+)")
+
+# Images netpbm lues : noir et blanc (PBM) ou niveaux de gris (PGM), en texte ou en binaire
+NETPBM_FORMATS = (b"P1", b"P2", b"P4", b"P5")
+
+
+def read_image(file: str) -> np.ndarray:
+    """
+    Read a black and white (PBM) or grayscale (PGM) netpbm image, as written by most image editors
+
+    :param file: image file path
+    :return: (line, column) value of every pixel between 0 and 1 : 1 for a black PBM pixel, gray level / maximum gray
+             level for a PGM pixel
+    """
+    with open(file, "rb") as f:
+        data = f.read()
+
+    magic = data[:2]
+    if magic not in NETPBM_FORMATS:
+        raise ValueError("%s is not a PBM or PGM image" % file)
+
+    # En-tête : dimensions, puis valeur maximale sauf pour le noir et blanc
+    bitmap = magic in (b"P1", b"P4")
+    tokens: List[int] = []
+    pos = 2
+    while len(tokens) < (2 if bitmap else 3):
+        match = NETPBM_TOKEN.match(data, pos)
+        if match is None:
+            raise ValueError("Truncated image header in %s" % file)
+        tokens.append(int(match.group(1)))
+        pos = match.end()
+    width, height = tokens[:2]
+    maxval = 1 if bitmap else tokens[2]
+
+    if magic == b"P1":
+        pixels = np.frombuffer(re.sub(rb"\s", b"", data[pos:]), dtype=np.uint8)[:width * height] - ord("0")
+    elif magic == b"P2":
+        pixels = np.array(data[pos:].split()[:width * height], dtype=np.int64)
+    elif magic == b"P4":
+        # Chaque ligne est complétée jusqu'à un octet entier
+        row_bytes = -(-width // 8)
+        raster = np.frombuffer(data, dtype=np.uint8, count=row_bytes * height, offset=pos + 1)
+        pixels = np.unpackbits(raster.reshape(height, row_bytes), axis=1)[:, :width]
+    else:
+        dtype = np.uint8 if maxval < 256 else np.dtype(">u2")
+        pixels = np.frombuffer(data, dtype=dtype, count=width * height, offset=pos + 1)
+
+    return pixels.reshape(height, width) / maxval
+
+
+def load_map(file: str) -> np.ndarray:
+    """
+    Load a 2D map : .npy array (memory-mapped, not read in memory), netpbm image, or text file of comma separated
+    values
+
+    :param file: map file path
+    :return: (line, column) values
+    """
+    extension = os.path.splitext(file)[1].lower()
+    if extension == ".npy":
+        return np.load(file, mmap_mode="r")
+    if extension in (".pbm", ".pgm"):
+        return read_image(file)
+    return np.loadtxt(file, delimiter=",", ndmin=2)
+
+
+def resample(values: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Stretch a map to the board, each cell taking the value of the closest point of the map
+
+    :param values: (line, column) map
+    :param shape: (length, width) of the board
+    :return: map of the board shape, values itself if it already has this shape
+    """
+    if values.shape == shape:
+        return values
+
+    rows = np.arange(shape[0]) * values.shape[0] // shape[0]
+    columns = np.arange(shape[1]) * values.shape[1] // shape[1]
+    return values[np.ix_(rows, columns)]
+
+
+def load_immunity_map(file: str, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Load the probability of every cell to be immune at round 0 (see load_map for the file formats). An image gives
+    the probability of each pixel by its gray level, or 1 for the black pixels of a PBM image. A floating point .npy
+    map of the board shape keeps its own dtype and stays memory-mapped.
+
+    :param file: map file path
+    :param shape: (length, width) of the board, to which the map is stretched
+    :return: (length, width) immunity probabilities, float32 unless the map is already floating point
+    """
+    immunity_map = resample(load_map(file), shape)
+    if immunity_map.size and (immunity_map.min() < 0 or immunity_map.max() > 1):
+        raise ValueError("Immunity probabilities must be between 0 and 1")
+
+    # Une carte déjà flottante est gardée telle quelle : la convertir lirait tout le fichier en mémoire
+    if np.issubdtype(immunity_map.dtype, np.floating):
+        return immunity_map
+    return immunity_map.astype(np.float32)
+
+
+def load_cluster_cells(file: str, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    Load the cells of the initial clusters
+
+    :param file: text file of "line,column" pairs, .npy array of (line, column) pairs, or netpbm image whose black
+                 (PBM) or light (PGM, gray level above half) pixels are the clusters, stretched to the board
+    :param shape: (length, width) of the board
+    :return: (cluster, 2) line and column of each cluster, without duplicates
+    """
+    extension = os.path.splitext(file)[1].lower()
+    if extension in (".pbm", ".pgm"):
+        image = read_image(file)
+        x, y = np.nonzero(image > 0.5)
+        cells = np.column_stack((x * shape[0] // image.shape[0], y * shape[1] // image.shape[1]))
+    elif extension == ".npy":
+        cells = np.load(file)
+    else:
+        cells = np.loadtxt(file, delimiter=",", ndmin=2, dtype=np.int64)
+
+    return np.unique(cells.reshape(-1, 2).astype(np.int64), axis=0)
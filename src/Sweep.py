@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import itertools
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from DiseaseBoard import BoardSize, ENGINE_FRONTIER, MODEL_VERSION, parameter_value
+from Ensemble import EnsembleResult, map_replicas
+
+# Paramètres et résultats de chaque combinaison
+SweepResult = List[Tuple[Dict[str, Any], EnsembleResult]]
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of replica counters
+
+    The key of a replica is a hash of everything its result depends on : parameters, seed, board size, cluster number,
+    round number, engine and model version. Each replica is stored in its own .npy file.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self._directory: str = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @staticmethod
+    def key(description: Dict[str, Any]) -> str:
+        """
+        :param description: everything the result depends on, JSON serializable
+        :return: cache key
+        """
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], key + ".npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        :param key: cache key
+        :return: cached counters, None if missing
+        """
+        try:
+            return np.load(self._path(key))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key: str, counters: np.ndarray) -> None:
+        """
+        Store counters, through a temporary file so that an interrupted write never leaves a partial entry
+
+        :param key: cache key
+        :param counters: counters to store
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".%d.tmp" % os.getpid()
+        with open(temp_path, "wb") as f:
+            np.save(f, counters)
+        os.replace(temp_path, path)
+
+
+def sweep(ranges: Dict[str, Sequence[Any]], replica_nbr: int, round_nbr: int, size: BoardSize, cluster_nbr: int,
+          parameters: Optional[Dict[str, Any]] = None, engine: str = ENGINE_FRONTIER, seed: Optional[int] = 0,
+          cache_dir: Optional[str] = None, processes: Optional[int] = None) -> SweepResult:
+    """
+    Run replicas of every combination of parameter values, on a process pool
+
+    Replica i of every combination uses the same random stream as replica i of run_ensemble with the same seed. With
+    a cache directory, the replicas already computed by a previous sweep are read from the cache instead of being
+    simulated again. Without a seed, the results cannot be reproduced : they are neither read from nor written to the
+    cache.
+
+    :param ranges: values of the swept DiseaseBoard parameters, by property name
+    :param replica_nbr: number of replicas of each combination
+    :param round_nbr: number of rounds to simulate
+    :param size: side of a square board, or (length, width)
+    :param cluster_nbr: number of initial disease clusters
+    :param parameters: other DiseaseBoard parameters, by property name
+    :param engine: simulation engine
+    :param seed: sweep seed (None for a random one)
+    :param cache_dir: cache directory (None for no cache)
+    :param processes: number of worker processes (None for one per core, 1 to run in the current process)
+    :return: parameters and replica counters of every combination, in the order of itertools.product(*ranges)
+    """
+    names = list(ranges)
+    points = [{**(parameters or {}), **dict(zip(names, values))}
+              for values in itertools.product(*(ranges[name] for name in names))]
+    points = [{name: parameter_value(name, value) for name, value in point.items()} for point in points]
+
+    cache = ResultCache(cache_dir) if cache_dir is not None and seed is not None else None
+    seeds = np.random.SeedSequence(seed).spawn(replica_nbr)
+    counters: Dict[Tuple[int, int], np.ndarray] = {}
+    missing: List[Tuple[int, int, str]] = []
+    tasks: List[Tuple] = []
+
+    for point_index, point in enumerate(points):
+        for replica in range(replica_nbr):
+            key = ResultCache.key({"parameters": point, "seed": seed, "replica": replica, "size": size,
+                                   "cluster_nbr": cluster_nbr, "round_nbr": round_nbr, "engine": engine,
+                                   "model_version": MODEL_VERSION})
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                counters[point_index, replica] = cached
+            else:
+                missing.append((point_index, replica, key))
+                tasks.append((size, cluster_nbr, round_nbr, point, engine, seeds[replica]))
+
+    # Toutes les combinaisons manquantes sont réparties sur le même pool de processus
+    for (point_index, replica, key), result in zip(missing, map_replicas(tasks, processes)):
+        counters[point_index, replica] = result
+        if cache is not None:
+            cache.put(key, result)
+
+    return [(point, EnsembleResult(np.stack([counters[point_index, replica] for replica in range(replica_nbr)])))
+            for point_index, point in enumerate(points)]
@@ -1,20 +1,31 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from PyQt5.QtGui import (QColor, QPainter, QBrush, QPen, QPalette, QDoubleValidator, QIntValidator,
-                         QCursor)
+from PyQt5.QtGui import (QColor, QPainter, QPalette, QDoubleValidator, QIntValidator, QImage)
 from PyQt5.QtWidgets import (QWidget, QLabel, QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout,
-                             QGridLayout, QLineEdit, QApplication)
-from PyQt5.QtCore import (pyqtSignal, QSize, QPoint, Qt, QEvent, QLocale, QTimer)
+                             QGridLayout, QLineEdit, QApplication, QToolTip)
+from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QObject, QThread, QMutex, QMetaObject, QSize, QSizeF, QPoint,
+                          QPointF, QRectF, Qt, QLocale, QTimer)
+import numpy as np
 import pyqtgraph as pg
 import sys
 import getopt
-from typing import Optional, Union, cast
+from typing import Dict, List, NamedTuple, Optional, Tuple, cast
 
-from DiseaseBoard import DiseaseBoard, BoardState
+from DiseaseBoard import DiseaseBoard, BoardState, ENGINES, ENGINE_NUMPY
+from BoardHistory import LatestHistory
+from BoardPyramid import BoardPyramid
+from RunStore import RunWriter
 
 DEFAULT_BOARD_SIZE = 50
 DEFAULT_TOUR = 5
+
+# Taille maximale, en pixels, de l'affichage initial du board
+BOARD_VIEW_SIZE = 600
+
+# Repeinte partielle du board : taille des tuiles, en cases, et nombre de tuiles au-delà duquel tout est repeint
+DIRTY_TILE_SIZE = 16
+MAX_DIRTY_TILES = 64
 STATE = {
     "SUSCEPTIBLE": 0,
     "INFECTED": 1,
@@ -31,6 +42,9 @@ STATE_NAME = [("Susceptible", "Susceptible"), ("Infecté", "Infected"),
 STATUS_PLAYING = 1
 STATUS_STOPPED = 0
 
+# Délai entre deux tours, en ms, hors mode vitesse maximale
+PLAY_INTERVAL = 100
+
 IMMUNITY_RATE_PARAM = 0
 CLUSTER_NB_PARAM = 1
 TRANSMISSION_RATE_PARAM = 2
@@ -82,112 +96,360 @@ LANG_US: int = 1
 INFECTED_PLOT = 0
 HOSPITALIZED_PLOT = 1
 QUARANTINED_PLOT = 2
-PLOT_NB = 3
+IMMUNE_PLOT = 3
+DECEASED_PLOT = 4
+PLOT_NB = 5
+
+# Courbes affichées par défaut, les autres avec l'option -a
+DEFAULT_PLOTS = [INFECTED_PLOT, HOSPITALIZED_PLOT, QUARANTINED_PLOT]
+
+# État, couleur et légende de chaque courbe (le compteur des personnes saines est toujours nul)
+PLOT_CONFIGURATION = {
+    INFECTED_PLOT: ("INFECTED", (255, 0, 0), "infected 'on the road'"),
+    HOSPITALIZED_PLOT: ("HOSPITALIZED", (100, 110, 200), "hospitalized"),
+    QUARANTINED_PLOT: ("QUARANTINE", (255, 255, 0), "quarantined"),
+    IMMUNE_PLOT: ("IMMUNE", (150, 150, 150), "immune"),
+    DECEASED_PLOT: ("DECEASED", (0, 0, 0), "deceased"),
+}
 
+# Au-delà de ce nombre de tours, les courbes sont décimées à l'affichage
+DECIMATION_ROUND_NBR = 1000
 
-class Pos(QWidget):
-    expandable = pyqtSignal(int, int, name="expandable")
-    clicked = pyqtSignal(name="clicked")
-    ohno = pyqtSignal(name="ohno")
+# Chaque courbe est découpée en tronçons de ce nombre de tours : une image ne redonne à PyQtGraph que le dernier
+# tronçon, les tronçons terminés ne sont plus modifiés
+PLOT_CHUNK_ROUND_NBR = 500
 
-    # stores floating label list, as we might miss some leaveEvent, we need a way to hide them all
-    activeLabelList: list = []
 
-    def __init__(self, lang: int) -> None:
-        super(Pos, self).__init__(parent=None)
+class BoardView(QWidget):
+    """
+    Board display : the states are mapped to colours through a palette, and the whole board is painted as one image
 
-        self.setFixedSize(QSize(10, 10))
+    The mouse wheel zooms in and out around the cursor, a drag pans the board, and the state of the cell under the
+    cursor is shown in a tooltip.
+    """
 
-        self.lang: int = lang
+    # Couleur associée à l'état
+    STATE_COLOR = {
+        STATE["SUSCEPTIBLE"]: QColor(210, 210, 255),
+        STATE["INFECTED"]: QColor(Qt.red),
+        STATE["IMMUNE"]: QColor(Qt.lightGray),
+        STATE["QUARANTINE"]: QColor(Qt.yellow),
+        STATE["DECEASED"]: QColor(Qt.black),
+        STATE["HOSPITALIZED"]: QColor(100, 110, 200),
+    }
 
-        self.floatingLabel: QLabel = QLabel()
-        self.floatingLabel.setWindowFlags(Qt.FramelessWindowHint)
-        self.floatingLabel.setAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
+    ZOOM_FACTOR = 1.25
+    MAX_CELL_SIZE = 40.0
 
-        self.patient_state: Optional[int] = None
+    def __init__(self, lang: int, board_shape: Tuple[int, int], cell_size: float = 10) -> None:
+        super(BoardView, self).__init__(parent=None)
 
-    def redraw(self, state: int) -> None:
-        self.patient_state = state
+        self.lang: int = lang
+        # Les pixels de l'image sont la copie affichée du plateau : seules les cases modifiées y sont recopiées
+        self.drawn: bool = False
+
+        # Image indexée : chaque pixel contient l'état de la case, la table des couleurs fait la conversion
+        length, width = board_shape
+        self.image: QImage = QImage(width, length, QImage.Format_Indexed8)
+        color_table = [QColor(Qt.white).rgb()] * 256
+        for state, color in BoardView.STATE_COLOR.items():
+            color_table[state] = color.rgb()
+        self.image.setColorTable(color_table)
+        self.image.fill(STATE["SUSCEPTIBLE"])
+
+        # Vue numpy sur les pixels de l'image, dont les lignes sont alignées sur 4 octets. Le voidptr expose ces
+        # octets par le protocole buffer, que les stubs de PyQt5 ne déclarent pas
+        bits = self.image.bits()
+        bits.setsize(self.image.sizeInBytes())
+        pixels = np.frombuffer(cast(memoryview, bits), dtype=np.uint8)
+        self.pixels: np.ndarray = pixels.reshape(length, self.image.bytesPerLine())
+
+        # Vues réduites, affichées quand une case fait moins d'un pixel
+        self.pyramid: BoardPyramid = BoardPyramid(board_shape)
+        self.colors: np.ndarray = np.array([[BoardView.STATE_COLOR[state].red(), BoardView.STATE_COLOR[state].green(),
+                                             BoardView.STATE_COLOR[state].blue()] for state in range(len(STATE))])
+
+        self.cell_size: float = float(cell_size)
+        self.offset: QPointF = QPointF(0, 0)
+        self.dragStart: Optional[QPoint] = None
+
+        self.setFixedSize(QSize(round(width * cell_size), round(length * cell_size)))
+        self.setMouseTracking(True)
+
+    def redraw(self, bs: BoardState) -> None:
+        self.drawn = True
+        self.pixels[:, :bs.shape[1]] = bs
+        self.pyramid.rebuild(bs)
         self.update()
 
+    def redrawCells(self, index: np.ndarray, states: np.ndarray) -> None:
+        """
+        Repaint only the given cells, that changed since the last redraw
+
+        :param index: flat index of the changed cells, without duplicates
+        :param states: new state of each changed cell
+        """
+        width = self.image.width()
+        x, y = np.divmod(index, width)
+        if self.pyramid.level_nbr > 1:
+            self.pyramid.update(index, self.pixels[x, y], states)
+        self.pixels[x, y] = states
+
+        # Les zones à repeindre sont regroupées par tuiles, pour limiter le nombre de rectangles
+        tiles = np.unique((x // DIRTY_TILE_SIZE) * (width // DIRTY_TILE_SIZE + 1) + y // DIRTY_TILE_SIZE)
+        if tiles.size > MAX_DIRTY_TILES:
+            self.update()
+            return
+
+        tile_x, tile_y = np.divmod(tiles, width // DIRTY_TILE_SIZE + 1)
+        tile_size = DIRTY_TILE_SIZE * self.cell_size
+        for tx, ty in zip(tile_x.tolist(), tile_y.tolist()):
+            rect = QRectF(self.offset.x() + ty * tile_size, self.offset.y() + tx * tile_size, tile_size, tile_size)
+            self.update(rect.toAlignedRect())
+
     def paintEvent(self, event) -> None:
         p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing)
+        p.fillRect(event.rect(), self.palette().color(QPalette.Window))
+
+        if not self.drawn:
+            return
+
+        # Seule la partie de l'image dans la zone à repeindre est dessinée, au niveau de détail adapté au zoom
+        level = self.pyramid.level_for(self.cell_size)
+        if level == 0:
+            image_width, image_height = self.image.width(), self.image.height()
+        else:
+            image_height, image_width = self.pyramid.counts(level).shape[:2]
+        block_size = self.cell_size * (1 << level)
 
-        r = event.rect()
+        exposed = QRectF(event.rect()).intersected(QRectF(self.offset, QSizeF(self.image.width() * self.cell_size,
+                                                                              self.image.height() * self.cell_size)))
+        if exposed.isEmpty():
+            return
 
-        outer: Optional[Union[QColor, Qt.GlobalColor]] = None
-        inner: Optional[Union[QColor, Qt.GlobalColor]] = None
+        left = int((exposed.left() - self.offset.x()) // block_size)
+        top = int((exposed.top() - self.offset.y()) // block_size)
+        right = min(image_width, int(np.ceil((exposed.right() - self.offset.x()) / block_size)))
+        bottom = min(image_height, int(np.ceil((exposed.bottom() - self.offset.y()) / block_size)))
 
-        if self.patient_state == STATE["SUSCEPTIBLE"]:
-            blue_color: QColor = QColor(210, 210, 255)
-            outer, inner = blue_color, blue_color
-        elif self.patient_state == STATE["INFECTED"]:
-            outer, inner = Qt.darkRed, Qt.red
-        elif self.patient_state == STATE["DECEASED"]:
-            outer, inner = Qt.black, Qt.black
-        elif self.patient_state == STATE["QUARANTINE"]:
-            outer, inner = Qt.darkYellow, Qt.yellow
-        elif self.patient_state == STATE["IMMUNE"]:
-            outer, inner = Qt.gray, Qt.lightGray
-        elif self.patient_state == STATE["HOSPITALIZED"]:
-            darkblue_color: QColor = QColor(100, 110, 200)
-            outer, inner = darkblue_color, darkblue_color
+        source = QRectF(left, top, right - left, bottom - top)
+        target = QRectF(self.offset.x() + left * block_size, self.offset.y() + top * block_size,
+                        source.width() * block_size, source.height() * block_size)
+        if level == 0:
+            p.drawImage(target, self.image, source)
+            return
 
-        if outer is None or inner is None:
-            raise ValueError("Invalid color")
+        # Couleur de chaque bloc : mélange des couleurs des états, pondéré par leur proportion
+        counts = self.pyramid.counts(level)[top:bottom, left:right]
+        fractions = counts / counts.sum(axis=2, keepdims=True)
+        rgb = np.rint(fractions @ self.colors).astype(np.uint8)
+        # Les octets restent référencés par data tant que l'image est dessinée
+        data = rgb.tobytes()
+        overview = QImage(data, rgb.shape[1], rgb.shape[0], 3 * rgb.shape[1], QImage.Format_RGB888)
+        p.drawImage(target, overview)
+
+    def cellAt(self, position: QPoint) -> Optional[Tuple[int, int]]:
+        if not self.drawn:
+            return None
+
+        x = int((position.y() - self.offset.y()) // self.cell_size)
+        y = int((position.x() - self.offset.x()) // self.cell_size)
+        if 0 <= x < self.image.height() and 0 <= y < self.image.width():
+            return x, y
+
+        return None
+
+    def wheelEvent(self, event) -> None:
+        factor = BoardView.ZOOM_FACTOR if event.angleDelta().y() > 0 else 1 / BoardView.ZOOM_FACTOR
+        min_cell_size = min(self.width() / self.pixels.shape[1], self.height() / self.pixels.shape[0])
+        new_cell_size = min(max(self.cell_size * factor, min_cell_size), BoardView.MAX_CELL_SIZE)
+
+        # Le point sous le curseur reste en place
+        cursor = QPointF(event.pos())
+        self.offset = cursor - (cursor - self.offset) * (new_cell_size / self.cell_size)
+        self.cell_size = new_cell_size
+        self.update()
 
-        p.fillRect(r, QBrush(inner))
-        pen = QPen(outer)
-        pen.setWidth(1)
-        p.setPen(pen)
-        p.drawRect(r)
+    def mousePressEvent(self, event) -> None:
+        if event.button() == Qt.LeftButton:
+            self.dragStart = event.pos()
 
-    @staticmethod
-    def click() -> None:
-        pass
-        return
+    def mouseReleaseEvent(self, event) -> None:
+        self.dragStart = None
 
-        # self.clicked.emit()
+    def mouseMoveEvent(self, event) -> None:
+        if self.dragStart is not None:
+            self.offset += QPointF(event.pos() - self.dragStart)
+            self.dragStart = event.pos()
+            self.update()
+            return
 
-    def mouseReleaseEvent(self, e) -> None:
-        pass
+        cell = self.cellAt(event.pos())
+        if cell is None:
+            QToolTip.hideText()
+            return
 
-    def enterEvent(self, event) -> None:
-        if event.type() == QEvent.Enter and not self.floatingLabel.isVisible():
-            self.cleanFloatingLabel()
+        QToolTip.showText(event.globalPos(), STATE_NAME[self.pixels[cell]][self.lang], self)
 
-            # Get current position of the cursor as a QPoint
-            position: QPoint = QCursor.pos()  # type: ignore
-            position += QPoint(0, -20)  # Move the floating label up to improve its visibility
+    def leaveEvent(self, event) -> None:
+        QToolTip.hideText()
+
+
+class Frame(NamedTuple):
+    """
+    Snapshot of a round, published by the simulation worker for display : the cells changed since the last displayed
+    frame, or a copy of the whole board when everything must be repainted
+    """
+    round_nbr: int
+    # Copie du plateau pour tout repeindre, None si seules les cases modifiées sont données
+    board: Optional[BoardState]
+    # Cases modifiées depuis la dernière image affichée, sans doublons, et leur état
+    dirty: Optional[np.ndarray]
+    states: Optional[np.ndarray]
+    sick_nbr: int
+    hospitalized_nbr: int
+    deceased_nbr: int
+    diagnosed_nbr: int
+
+
+class SimulationWorker(QObject):
+    """
+    Runs the rounds of the simulation in its own thread
+
+    After each round, the changed cells and their states are kept as the latest frame, so that a round costs the
+    size of its changes and not the board area. The board is only copied when the whole display must be repainted.
+    frameReady is only emitted when the previous frame has been taken : if the display falls behind, the
+    intermediate frames are dropped and their changed cells are merged into the latest one.
+    """
+    frameReady = pyqtSignal(name="frameReady")
+    finished = pyqtSignal(name="finished")
+
+    def __init__(self, disease_board: DiseaseBoard, total_round_nbr: int, run_directory: Optional[str] = None) -> None:
+        super(SimulationWorker, self).__init__(parent=None)
 
-            if self.patient_state is None:
-                raise ValueError("Invalid patient state")
+        self.diseaseBoard: DiseaseBoard = disease_board
+        self.total_round_nbr: int = total_round_nbr
 
-            label_text = STATE_NAME[self.patient_state][self.lang]
-            self.floatingLabel.setText(label_text)
-            self.floatingLabel.move(position)
+        # Enregistrement des tours sur disque, ouvert au premier tour pour prendre en compte la configuration
+        self.runDirectory: Optional[str] = run_directory
+        self.runWriter: Optional[RunWriter] = None
 
-            self.floatingLabel.setVisible(True)
-            self.floatingLabel.update()
+        # Le timer est créé dans le thread du worker, au premier lancement
+        self.timer: Optional[QTimer] = None
 
-            Pos.activeLabelList.append(self.floatingLabel)
+        self.lock = QMutex()
+        self.frame: Optional[Frame] = None
 
-    def leaveEvent(self, event) -> None:
-        if event.type() == QEvent.Leave:
-            self.cleanFloatingLabel()
+    @pyqtSlot(int)
+    def play(self, interval: int) -> None:
+        """
+        Run rounds until the end of the simulation
+
+        :param interval: delay between two rounds, in ms (0 to run as fast as possible)
+        """
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.timeout.connect(self.tick)  # type: ignore
+        self.timer.start(interval)
+
+    @pyqtSlot()
+    def pause(self) -> None:
+        if self.timer is not None:
+            self.timer.stop()
 
-    @staticmethod
-    def cleanFloatingLabel() -> None:
-        for i, label in enumerate(Pos.activeLabelList):
-            label.setVisible(False)
-            label.update()
+    @pyqtSlot()
+    def step(self) -> None:
+        if self.diseaseBoard.current_round + 1 > self.total_round_nbr:
+            return
 
-        Pos.activeLabelList = []
+        if self.runDirectory is not None and self.runWriter is None:
+            self.runWriter = RunWriter(self.runDirectory, self.diseaseBoard)
+
+        self.diseaseBoard.next_round()
+        if self.runWriter is not None:
+            self.runWriter.write_round()
+        self.publish()
+
+    def closeRun(self) -> None:
+        """
+        Close the files of the recorded run, the next round starts a new one
+        """
+        if self.runWriter is not None:
+            self.runWriter.close()
+            self.runWriter = None
+
+    @pyqtSlot()
+    def tick(self) -> None:
+        if self.diseaseBoard.current_round + 1 > self.total_round_nbr or \
+                (self.diseaseBoard.sick_nbr == 0 and self.diseaseBoard.quarantined_nbr == 0):
+            self.pause()
+            self.finished.emit()
+            return
+
+        self.step()
+
+    def publish(self) -> None:
+        """
+        Keep a snapshot of the current round as the latest frame
+        """
+        board = self.diseaseBoard.last_board()
+        changes = self.diseaseBoard.last_changes
+
+        self.lock.lock()
+        try:
+            copy: Optional[BoardState] = None
+            dirty: Optional[np.ndarray] = None
+            states: Optional[np.ndarray] = None
+            if changes is not None:
+                dirty, states = changes
+
+            # L'image précédente n'a pas été affichée : ses changements sont fusionnés avec ceux de ce tour
+            if self.frame is not None and dirty is not None and states is not None:
+                if self.frame.board is not None:
+                    copy = self.frame.board
+                    copy.ravel()[dirty] = states
+                elif self.frame.dirty is not None and self.frame.states is not None:
+                    # Le dernier état de chaque case l'emporte
+                    merged = np.concatenate((dirty, self.frame.dirty))
+                    dirty, first = np.unique(merged, return_index=True)
+                    states = np.concatenate((states, self.frame.states))[first]
+
+            # Trop de changements, ou aucun connu : tout le plateau est copié et repeint
+            if copy is None and (dirty is None or dirty.size > board.size // 4):
+                copy = BoardState(board.copy())
+            if copy is not None:
+                dirty, states = None, None
+
+            emit = self.frame is None
+            self.frame = Frame(self.diseaseBoard.current_round, copy, dirty, states,
+                               int(self.diseaseBoard.sick_nbr), int(self.diseaseBoard.hospitalized_nbr),
+                               int(self.diseaseBoard.deceased_nbr), int(self.diseaseBoard.diagnosed_nbr))
+        finally:
+            self.lock.unlock()
+
+        if emit:
+            self.frameReady.emit()
+
+    def takeFrame(self) -> Optional[Frame]:
+        """
+        :return: latest frame, None if it has already been taken
+        """
+        self.lock.lock()
+        try:
+            frame, self.frame = self.frame, None
+        finally:
+            self.lock.unlock()
+
+        return frame
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, newboard_size: int, round_nbr: int, disease_board: DiseaseBoard) -> None:
+    playRequested = pyqtSignal(int, name="playRequested")
+    pauseRequested = pyqtSignal(name="pauseRequested")
+    stepRequested = pyqtSignal(name="stepRequested")
+
+    def __init__(self, newboard_size: int, round_nbr: int, disease_board: DiseaseBoard,
+                 plot_all_states: bool = False, run_directory: Optional[str] = None) -> None:
         super(MainWindow, self).__init__(parent=None)
         self.setWindowTitle("spread : disease spread simple model")
 
@@ -216,9 +478,16 @@ class MainWindow(QMainWindow):
         self.nb_toursLabel.setAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
         self.nb_toursLabel.setText("%03d" % 0)
 
-        self._timer = QTimer(parent=self)
-        self._timer.timeout.connect(self.updateTimer)  # type: ignore
-        self._timer.start(100)  # in ms
+        # Les tours sont calculés dans un thread dédié, l'interface n'affiche que la dernière image disponible
+        self.worker = SimulationWorker(disease_board, round_nbr, run_directory)
+        self.workerThread = QThread(parent=self)
+        self.worker.moveToThread(self.workerThread)
+        self.worker.frameReady.connect(self.frameReady)  # type: ignore
+        self.worker.finished.connect(self.simulationFinished)  # type: ignore
+        self.playRequested.connect(self.worker.play)  # type: ignore
+        self.pauseRequested.connect(self.worker.pause)  # type: ignore
+        self.stepRequested.connect(self.worker.step)  # type: ignore
+        self.workerThread.start()
 
         self.goButton = QPushButton("GO")
         self.goButton.setFixedSize(QSize(72, 32))
@@ -235,10 +504,18 @@ class MainWindow(QMainWindow):
         self.resetButton.setFlat(False)
         self.resetButton.pressed.connect(self.resetButtonPressed)  # type: ignore
 
+        self.maxSpeedButton = QPushButton("MAX")
+        self.maxSpeedButton.setFixedSize(QSize(72, 32))
+        self.maxSpeedButton.setFlat(False)
+        self.maxSpeedButton.setCheckable(True)
+        self.maxSpeedButton.setToolTip(("Vitesse maximale", "Maximum speed")[self.lang])
+        self.maxSpeedButton.toggled.connect(self.maxSpeedButtonToggled)  # type: ignore
+
         hb.addWidget(self.nb_toursLabel)  # type: ignore
         hb.addWidget(self.goButton)  # type: ignore
         hb.addWidget(self.nextButton)  # type: ignore
         hb.addWidget(self.resetButton)  # type: ignore
+        hb.addWidget(self.maxSpeedButton)  # type: ignore
 
         # vb permet de mettre en place 2 lignes
         # La première ligne contient le hb ci-dessous (le header)
@@ -257,36 +534,38 @@ class MainWindow(QMainWindow):
         self.confgrid: QGridLayout = self.setupConfGrid()
 
         #
-        # Principal grid pour l'affichage du diseaseBoard
+        # Affichage du diseaseBoard, en une seule image
         #
-        self.grid = QGridLayout()
-        self.grid.setSpacing(1)
+        board_shape = disease_board.last_board().shape
+        # Au-delà de BOARD_VIEW_SIZE cases, une case fait moins d'un pixel et les vues réduites sont affichées
+        cell_size = min(10, BOARD_VIEW_SIZE / max(board_shape))
+        self.boardView = BoardView(self.lang, board_shape, cell_size)
 
         # Nécessaire pour permettre à l'affichage du board de rester compact
         grid_layout = QVBoxLayout()
         grid_layout.addStretch(1)
-        grid_layout.addLayout(self.grid)
+        grid_layout.addWidget(self.boardView)  # type: ignore
 
         #
         # Zone pour afficher les graphiques
         #
 
         graph_layout = QHBoxLayout()
-        graph_widget = pg.PlotWidget()
-        graph_widget.setBackground(self.palette().color(QPalette.Window))
-        graph_widget.setXRange(0, self.total_round_nbr, padding=0.0)  # type: ignore
-        graph_layout.addWidget(graph_widget)  # type: ignore
-
-        self.plots = [None] * PLOT_NB
-        self.plots[INFECTED_PLOT] = graph_widget.plot([], [], pen=pg.mkPen(color=(255, 0, 0), width=3),
-                                                      name="infected 'on the road'")
-        self.plots[HOSPITALIZED_PLOT] = graph_widget.plot([], [], pen=pg.mkPen(color=(100, 110, 200),
-                                                                               width=3),
-                                                          name="hospitalized")
-        self.plots[QUARANTINED_PLOT] = graph_widget.plot([], [],
-                                                         pen=pg.mkPen(color=(255, 255, 0), width=3),
-                                                         name="quarantined")
-        graph_widget.addLegend()
+        self.graphWidget = pg.PlotWidget()
+        self.graphWidget.setBackground(self.palette().color(QPalette.Window))
+        self.graphWidget.setXRange(0, self.total_round_nbr, padding=0.0)  # type: ignore
+        graph_layout.addWidget(self.graphWidget)  # type: ignore
+
+        # Compteurs affichés, dans des tableaux alloués pour toute la simulation : chaque image n'y recopie que les
+        # tours qu'elle ajoute
+        self.plotRounds: np.ndarray = np.arange(self.total_round_nbr + 1)
+        self.plotData: np.ndarray = np.zeros((self.total_round_nbr + 1, len(STATE)), dtype=int)
+        self.plottedRound = -1
+
+        self.graphWidget.addLegend()
+        self.plots: Dict[int, List[pg.PlotDataItem]] = {}
+        for plot in (range(PLOT_NB) if plot_all_states else DEFAULT_PLOTS):
+            self.plots[plot] = [self.addPlotChunk(plot, PLOT_CONFIGURATION[plot][2])]
 
         main_layout = QHBoxLayout()
         main_layout.addStretch(1)
@@ -368,51 +647,97 @@ class MainWindow(QMainWindow):
         return confgrid
 
     def initMap(self, bs: BoardState) -> None:
-        # Add positions to the map
-        for x in range(0, self.board_size):
-            for y in range(0, self.board_size):
-                w = Pos(self.lang)
-                self.grid.addWidget(w, x, y)
-                w.redraw(bs[x, y])
-
-    def updateMap(self, bs: BoardState) -> None:
-        # Add positions to the map
-        for x in range(0, self.board_size):
-            for y in range(0, self.board_size):
-                widget = self.grid.itemAtPosition(x, y).widget()
-                my_pos = cast(Pos, widget)
-                my_pos.redraw(bs[x, y])
+        self.boardView.redraw(bs)
+
+    def updateMap(self, frame: Frame) -> None:
+        # Seules les cases modifiées depuis la dernière image affichée sont repeintes
+        if frame.board is not None:
+            self.boardView.redraw(frame.board)
+        elif frame.dirty is not None and frame.states is not None:
+            self.boardView.redrawCells(frame.dirty, frame.states)
+
+        self.nb_toursLabel.setText("%03d" % frame.round_nbr)
 
         infected_text = "#Sick = "
-        infected_text += self.qLocale.toString(self.diseaseBoard.sick_nbr)
+        infected_text += self.qLocale.toString(frame.sick_nbr)
         infected_text += " (inc #Hospit. = "
-        infected_text += self.qLocale.toString(self.diseaseBoard.hospitalized_nbr)
+        infected_text += self.qLocale.toString(frame.hospitalized_nbr)
         infected_text += ")"
 
         self.infectedLabel.setText(infected_text)
 
-        self.deceased_label.setText("#Deceased = " + self.qLocale.toString(self.diseaseBoard.deceased_nbr))
-
-        self.deceased_label.setText("#Deceased = " + self.qLocale.toString(self.diseaseBoard.deceased_nbr))
-        if self.diseaseBoard.diagnosed_nbr != 0:
-            explanation = "#infected / #detected =" + self.qLocale.toString(
-                self.diseaseBoard.sick_nbr / self.diseaseBoard.diagnosed_nbr)
+        self.deceased_label.setText("#Deceased = " + self.qLocale.toString(frame.deceased_nbr))
+        if frame.diagnosed_nbr != 0:
+            explanation = "#infected / #detected =" + self.qLocale.toString(frame.sick_nbr / frame.diagnosed_nbr)
             self.ratio_label.setText(explanation)
         else:
             self.ratio_label.setText("#infected / #detected = N/A")
 
-        round_nbr = self.diseaseBoard.current_round
+        self.updatePlots(frame.round_nbr)
+
+    def addPlotChunk(self, plot: int, name: Optional[str] = None) -> pg.PlotDataItem:
+        """
+        Add an empty chunk to the curve of a plot
+
+        :param plot: plot of the chunk
+        :param name: legend of the curve, only given for its first chunk
+        :return: chunk curve
+        """
+        color = PLOT_CONFIGURATION[plot][1]
+        chunk = self.graphWidget.plot([], [], pen=pg.mkPen(color=color, width=3), name=name)
+        if self.total_round_nbr > DECIMATION_ROUND_NBR:
+            chunk.setDownsampling(auto=True, method="peak")
+            chunk.setClipToView(True)
+        return chunk
+
+    def updatePlots(self, round_nbr: int) -> None:
+        # Après une réinitialisation, les courbes repartent du premier tour, sur leur seul premier tronçon
+        if round_nbr <= self.plottedRound:
+            self.plottedRound = -1
+            for chunks in self.plots.values():
+                for chunk in chunks[1:]:
+                    self.graphWidget.removeItem(chunk)
+                del chunks[1:]
+
+        # Seuls les nouveaux tours sont recopiés, le worker a pu en calculer d'autres depuis cette image
+        start = self.plottedRound + 1
+
+        # Le tronçon k couvre les tours k * PLOT_CHUNK_ROUND_NBR à (k + 1) * PLOT_CHUNK_ROUND_NBR, son dernier tour
+        # étant le premier du tronçon suivant pour que la courbe reste continue
+        first_chunk = max(start - 1, 0) // PLOT_CHUNK_ROUND_NBR
+        last_chunk = round_nbr // PLOT_CHUNK_ROUND_NBR
+        for plot, chunks in self.plots.items():
+            state = PLOT_CONFIGURATION[plot][0]
+            self.plotData[start:round_nbr + 1, STATE[state]] = self.diseaseBoard.state_data(state)[start:round_nbr + 1]
+            for k in range(first_chunk, last_chunk + 1):
+                if k == len(chunks):
+                    chunks.append(self.addPlotChunk(plot))
+                rounds = slice(k * PLOT_CHUNK_ROUND_NBR, min((k + 1) * PLOT_CHUNK_ROUND_NBR, round_nbr) + 1)
+                chunks[k].setData(self.plotRounds[rounds], self.plotData[rounds, STATE[state]])
+        self.plottedRound = round_nbr
+
+    def frameReady(self) -> None:
+        frame = self.worker.takeFrame()
+        if frame is not None:
+            self.updateMap(frame)
+            self.updateR0()
 
-        self.plots[INFECTED_PLOT].setData(range(0, round_nbr + 1),  # type: ignore
-                                          self.diseaseBoard.infected_data)
-        self.plots[HOSPITALIZED_PLOT].setData(range(0, round_nbr + 1),  # type: ignore
-                                              self.diseaseBoard.hospitalized_data)
-        self.plots[QUARANTINED_PLOT].setData(range(0, round_nbr + 1),  # type: ignore
-                                             self.diseaseBoard.quarantined_data)
+    def stopWorker(self) -> None:
+        # Appel bloquant : au retour, le worker ne calcule plus de tour et le board peut être modifié
+        QMetaObject.invokeMethod(self.worker, "pause", Qt.BlockingQueuedConnection)
+
+    def playInterval(self) -> int:
+        return 0 if self.maxSpeedButton.isChecked() else PLAY_INTERVAL
+
+    def maxSpeedButtonToggled(self, checked: bool) -> None:
+        if self.status == STATUS_PLAYING:
+            self.playRequested.emit(self.playInterval())
 
     def goButtonPressed(self) -> None:
         line_edit: QLineEdit
 
+        self.stopWorker()
+
         if self.diseaseBoard.current_round == 0:
             # Reconfiguration de la simulation
 
@@ -425,6 +750,7 @@ class MainWindow(QMainWindow):
         if self.status == STATUS_STOPPED:
             self.status = STATUS_PLAYING
             self.goButton.setText("PAUSE")
+            self.playRequested.emit(self.playInterval())
 
             for i in range(self.confgrid.rowCount()):
                 widget = self.confgrid.itemAtPosition(i, 1).widget()
@@ -446,17 +772,16 @@ class MainWindow(QMainWindow):
                 line_edit.repaint()
 
     def nextButtonPressed(self) -> None:
-        if self.diseaseBoard.current_round + 1 > self.total_round_nbr:
-            self.status = STATUS_STOPPED
+        if self.status == STATUS_PLAYING:
             return
 
-        etat: BoardState = self.diseaseBoard.next_round()
-        self.nb_toursLabel.setText("%03d" % self.diseaseBoard.current_round)
-        self.updateMap(etat)
-        self.updateR0()
-        self.grid.update()
+        self.stepRequested.emit()
 
     def resetButtonPressed(self) -> None:
+        self.stopWorker()
+        self.worker.takeFrame()
+        self.worker.closeRun()
+
         widget: QWidget = self.confgrid.itemAtPosition(IMMUNITY_RATE_PARAM, 1).widget()
         line_edit: QLineEdit = cast(QLineEdit, widget)
         self.diseaseBoard.immunity_rate = self.qLocale.toDouble(line_edit.text())[0]
@@ -466,36 +791,32 @@ class MainWindow(QMainWindow):
         self.diseaseBoard.cluster_nbr = self.qLocale.toInt(line_edit.text())[0]
 
         self.diseaseBoard.reset()
-        self.nb_toursLabel.setText("%03d" % 0)
-        self.updateMap(self.diseaseBoard.last_board())
+        self.worker.publish()
         self.updateR0()
 
+        self.goButton.setText("GO")
         self.goButton.setStyleSheet("color: black; selection-color: black")
         self.status = STATUS_STOPPED
 
-    def updateTimer(self) -> None:
-        if self.status == STATUS_PLAYING:
-
-            if self.diseaseBoard.current_round + 1 > self.total_round_nbr or \
-                    (self.diseaseBoard.sick_nbr == 0 and self.diseaseBoard.quarantined_nbr == 0):
-                self.status = STATUS_STOPPED
-                self.goButton.setStyleSheet("color: grey; selection-color: black")
-                self.goButton.setText("GO")
-                # Set text in goButton to dark gray
-
-                for i in range(self.confgrid.rowCount()):
-                    widget: QWidget = self.confgrid.itemAtPosition(i, 1).widget()
-                    line_edit: QLineEdit = cast(QLineEdit, widget)
-                    line_edit.setReadOnly(False)
-                    line_edit.setStyleSheet("color: black; selection-color: black")
-                    line_edit.repaint()
-
-                return
-
-            self.nb_toursLabel.setText("%03d" % self.diseaseBoard.current_round)
-            etat = self.diseaseBoard.next_round()
-            self.updateMap(etat)
-            self.updateR0()
+    def simulationFinished(self) -> None:
+        self.status = STATUS_STOPPED
+        self.goButton.setStyleSheet("color: grey; selection-color: black")
+        self.goButton.setText("GO")
+        # Set text in goButton to dark gray
+
+        for i in range(self.confgrid.rowCount()):
+            widget: QWidget = self.confgrid.itemAtPosition(i, 1).widget()
+            line_edit: QLineEdit = cast(QLineEdit, widget)
+            line_edit.setReadOnly(False)
+            line_edit.setStyleSheet("color: black; selection-color: black")
+            line_edit.repaint()
+
+    def closeEvent(self, event) -> None:
+        self.stopWorker()
+        self.worker.closeRun()
+        self.workerThread.quit()
+        self.workerThread.wait()
+        super(MainWindow, self).closeEvent(event)
 
     def updateR0(self) -> None:
         self.r0_label.setText("R0 = {:.3} ".format(self.diseaseBoard.R0))
@@ -506,7 +827,12 @@ def usage() -> None:
         """Usage: spread [options] round_number board_size cluster_number
             round_number: number of rounds for the simulation
             board_size: size of the board
-            cluster_number: number of initial board disease clusters""")
+            cluster_number: number of initial board disease clusters
+        Options:
+            -e engine: simulation engine, one of %s (default: %s)
+            -a: plot the counters of every state
+            -w directory: record every round in directory, that RunStore.RunReader reads""" % (
+            ", ".join(ENGINES), ENGINE_NUMPY))
 
 
 if __name__ == '__main__':
@@ -514,9 +840,12 @@ if __name__ == '__main__':
     tours = 60
     board_size = 30
     nb_clusters = 3
+    engine = ENGINE_NUMPY
+    plot_all_states = False
+    run_directory = None
 
     try:
-        optlist, args = getopt.getopt(sys.argv[1:], 'h')
+        optlist, args = getopt.getopt(sys.argv[1:], 'he:aw:')
     except getopt.GetoptError as err:
         print(err)
         usage()
@@ -526,17 +855,27 @@ if __name__ == '__main__':
         if o == '-h':
             usage()
             sys.exit()
-
-    if len(sys.argv) >= 2:
-        tours = int(sys.argv[1])
-
-    if len(sys.argv) >= 3:
-        board_size = int(sys.argv[2])
-
-    if len(sys.argv) >= 4:
-        nb_clusters = int(sys.argv[3])
-
-    db = DiseaseBoard(board_size, nb_clusters)
+        if o == '-e':
+            if c not in ENGINES:
+                usage()
+                sys.exit(2)
+            engine = c
+        if o == '-a':
+            plot_all_states = True
+        if o == '-w':
+            run_directory = c
+
+    if len(args) >= 1:
+        tours = int(args[0])
+
+    if len(args) >= 2:
+        board_size = int(args[1])
+
+    if len(args) >= 3:
+        nb_clusters = int(args[2])
+
+    # L'interface n'affiche que le dernier tour
+    db = DiseaseBoard(board_size, nb_clusters, engine, LatestHistory())
     # Entre 2 et 3 personnes contaminées par malade, si on considère qu'à chaque tour (a peu près un jour), on
     # a l'occasion de contaminer environ 15 personnes, et ce pendant la durée de la contamination, considérée comme
     # égale au délai de rétablissement
@@ -551,5 +890,5 @@ if __name__ == '__main__':
     db.social_distancing_contagion_rate = db.contagion_rate / 3
 
     app = QApplication([])
-    window = MainWindow(board_size, tours, db)
+    window = MainWindow(board_size, tours, db, plot_all_states, run_directory)
     app.exec_()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Lancement des simulations sans interface graphique : ce module ne doit jamais importer Qt
+
+import csv
+import getopt
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from BoardCodec import CODECS, save_board
+from BoardHistory import LatestHistory
+from ContactNetwork import ContactNetwork, grid_network, small_world_network, geometric_network
+from DiseaseBoard import (DiseaseBoard, BoardSize, STATE_NAMES, ENGINES, ENGINE_FRONTIER, ENGINE_NETWORK,
+                          board_parameters, configured_board, load_checkpoint, set_parameter)
+from RunStore import RunWriter, RUN_FORMATS
+from Seeding import load_cluster_cells, load_immunity_map
+
+DEFAULT_ROUND_NBR = 60
+DEFAULT_BOARD_SIZE = 30
+DEFAULT_CLUSTER_NBR = 3
+
+
+def write_counters(board: DiseaseBoard, path: str) -> None:
+    """
+    Write the counters of every state, one line per round, in a CSV file
+
+    :param board: simulated board
+    :param path: CSV file path
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["round"] + [state.lower() for state in STATE_NAMES])
+        for round_nbr, counters in enumerate(board.counters.tolist()):
+            writer.writerow([round_nbr] + counters)
+
+
+def run(board: DiseaseBoard, round_nbr: int, output_dir: str, snapshot_step: int = -1,
+        run_format: Optional[str] = None, snapshot_codec: Optional[str] = None) -> None:
+    """
+    Run a simulation, then write its counters and, optionally, snapshots of the board
+
+    :param board: board to simulate, from its current round
+    :param round_nbr: number of rounds to simulate
+    :param output_dir: directory of the output files, created if needed
+    :param snapshot_step: save the board every snapshot_step rounds (-1 for no snapshot)
+    :param run_format: also stream every round to the run subdirectory, in this RunStore format (None for no stream)
+    :param snapshot_codec: save the snapshots as board_<round>.bin files encoded by this BoardCodec codec (None for
+                           .npy files)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    def save_snapshot() -> None:
+        if snapshot_step > 0 and board.current_round % snapshot_step == 0:
+            if snapshot_codec is None:
+                np.save(os.path.join(output_dir, "board_%05d.npy" % board.current_round), board.last_board())
+            else:
+                save_board(os.path.join(output_dir, "board_%05d.bin" % board.current_round), board.last_board(),
+                           snapshot_codec)
+
+    writer = RunWriter(os.path.join(output_dir, "run"), board, run_format) if run_format is not None else None
+    try:
+        save_snapshot()
+        for _ in range(round_nbr):
+            board.next_round()
+            save_snapshot()
+            if writer is not None:
+                writer.write_round()
+    finally:
+        if writer is not None:
+            writer.close()
+
+    write_counters(board, os.path.join(output_dir, "counters.csv"))
+
+
+def parse_board_size(value: Any) -> BoardSize:
+    """
+    Read the board size given on the command line or in a config file
+
+    :param value: side of a square board, "<length>x<width>", or [length, width]
+    :return: board size
+    """
+    if isinstance(value, (list, tuple)):
+        length, width = value
+        return int(length), int(width)
+
+    length, sep, width = str(value).partition("x")
+    return (int(length), int(width)) if sep else int(length)
+
+
+def parse_network(description: str, length: int, width: int, seed: Optional[int]) -> ContactNetwork:
+    """
+    Build the contact network given on the command line
+
+    :param description: "grid", "small-world:<rewiring rate>" or "geometric:<radius>"
+    :param length: number of lines of the board
+    :param width: number of columns of the board
+    :param seed: seed of the random generator of the network
+    :return: contact network
+    """
+    kind, _, value = description.partition(":")
+    rng = np.random.default_rng(seed)
+    if kind == "grid" and not value:
+        return grid_network(length, width)
+    if kind == "small-world" and value:
+        return small_world_network(length, width, float(value), rng)
+    if kind == "geometric" and value:
+        return geometric_network(length, width, float(value), rng)
+
+    raise ValueError("Unknown network %r" % description)
+
+
+def usage() -> None:
+    print(
+        """Usage: spread-batch [options] [round_number board_size cluster_number]
+            round_number: number of rounds for the simulation (default: %d)
+            board_size: size of the board, or <length>x<width> for a rectangular board (default: %d)
+            cluster_number: number of initial board disease clusters (default: %d)
+        Options:
+            -c file: JSON config file, with optional "round_number", "board_size" (size or [length, width]),
+                     "cluster_number", "engine", "seed" and "parameters" (DiseaseBoard parameters) keys. Command line
+                     values take precedence
+            -e engine: simulation engine, one of %s (default: %s)
+            -p name=value: set a DiseaseBoard parameter, may be repeated. Parameters:
+                %s
+            -o directory: output directory (default: current directory)
+            -s step: save the board every step rounds, as board_<round>.npy files
+            -z codec: save the boards of -s as board_<round>.bin files, that BoardCodec.load_board reads, encoded
+                      by one of the codecs %s
+            -r seed: seed of the random generator, for reproducible runs
+            -f format: stream every round to the run directory, that RunStore.RunReader reads, in one of the
+                       formats %s
+            -l file: resume the run saved in a checkpoint file, for round_number more rounds. The board size,
+                     cluster number and seed are the saved ones, -e and -p options change the saved values
+            -k file: save a checkpoint file at the end of the run, that -l resumes
+            -n network: contacts of the network engine, selected by this option (-e can only be network), one
+                        of grid, small-world:<rewiring rate>, geometric:<radius>
+            -m directory: keep the board and contamination dates in memory-mapped files of this directory, for
+                          boards that do not fit in memory
+            -i file: immunity probability of every cell at round 0, instead of immunity_rate, from a .npy array,
+                     a PBM/PGM image (gray levels) or a CSV file, stretched to the board
+            -x file: cells of the initial clusters, instead of cluster_number random cells, from a CSV file of
+                     line,column pairs, a .npy array of pairs or a PBM/PGM image (black or light pixels). -i and -x
+                     cannot be used with -l
+        Writes the counters of every state, one line per round, in counters.csv""" % (
+            DEFAULT_ROUND_NBR, DEFAULT_BOARD_SIZE, DEFAULT_CLUSTER_NBR, ", ".join(ENGINES), ENGINE_FRONTIER,
+            ", ".join(board_parameters()), ", ".join(CODECS), ", ".join(RUN_FORMATS)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+
+    try:
+        optlist, args = getopt.getopt(argv, 'hc:e:p:o:s:z:r:f:l:k:n:m:i:x:')
+    except getopt.GetoptError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+
+    config: Dict[str, Any] = {}
+    parameters: Dict[str, Any] = {}
+    engine: Optional[str] = None
+    output_dir = "."
+    snapshot_step = -1
+    snapshot_codec: Optional[str] = None
+    seed: Optional[int] = None
+    run_format: Optional[str] = None
+    resume_file: Optional[str] = None
+    checkpoint_file: Optional[str] = None
+    network: Optional[str] = None
+    storage: Optional[str] = None
+    immunity_file: Optional[str] = None
+    cluster_file: Optional[str] = None
+
+    for o, c in optlist:
+        if o == '-h':
+            usage()
+            sys.exit()
+        if o == '-c':
+            with open(c) as f:
+                config = json.load(f)
+        if o == '-e':
+            engine = c
+        if o == '-p':
+            name, sep, value = c.partition("=")
+            if not sep:
+                usage()
+                sys.exit(2)
+            parameters[name] = value
+        if o == '-o':
+            output_dir = c
+        if o == '-s':
+            snapshot_step = int(c)
+        if o == '-z':
+            if c not in CODECS:
+                usage()
+                sys.exit(2)
+            snapshot_codec = c
+        if o == '-r':
+            seed = int(c)
+        if o == '-f':
+            if c not in RUN_FORMATS:
+                usage()
+                sys.exit(2)
+            run_format = c
+        if o == '-l':
+            resume_file = c
+        if o == '-k':
+            checkpoint_file = c
+        if o == '-n':
+            network = c
+        if o == '-m':
+            storage = c
+        if o == '-i':
+            immunity_file = c
+        if o == '-x':
+            cluster_file = c
+
+    # Options incompatibles, quel que soit leur ordre
+    if network is not None:
+        if engine not in (None, ENGINE_NETWORK):
+            print("-n selects the %s engine, it cannot be used with -e %s" % (ENGINE_NETWORK, engine))
+            usage()
+            sys.exit(2)
+        engine = ENGINE_NETWORK
+    if resume_file is not None and (immunity_file is not None or cluster_file is not None):
+        print("-i and -x set the initial board, they cannot be used with -l")
+        usage()
+        sys.exit(2)
+
+    round_nbr = int(args[0]) if len(args) >= 1 else config.get("round_number", DEFAULT_ROUND_NBR)
+    board_size = parse_board_size(args[1] if len(args) >= 2 else config.get("board_size", DEFAULT_BOARD_SIZE))
+    cluster_nbr = int(args[2]) if len(args) >= 3 else config.get("cluster_number", DEFAULT_CLUSTER_NBR)
+    if engine is None:
+        engine = config.get("engine")
+    parameters = {**config.get("parameters", {}), **parameters}
+    if seed is None:
+        seed = config.get("seed")
+
+    try:
+        # Les tours ne sont pas conservés en mémoire : seuls les compteurs et les instantanés sont écrits
+        if resume_file is not None:
+            board = load_checkpoint(resume_file, LatestHistory(), storage)
+            # Le moteur et les paramètres enregistrés ne changent que s'ils sont donnés explicitement
+            if engine is not None:
+                board.engine = engine
+            for name, value in parameters.items():
+                set_parameter(board, name, value)
+        else:
+            board = configured_board(board_size, cluster_nbr, parameters, engine or ENGINE_FRONTIER,
+                                     LatestHistory(), seed, storage)
+            # Plateau initial structuré : tiré à nouveau, avec la même graine
+            shape = (board.length, board.width)
+            if immunity_file is not None:
+                board.immunity_map = load_immunity_map(immunity_file, shape)
+            if cluster_file is not None:
+                board.cluster_cells = load_cluster_cells(cluster_file, shape)
+            if immunity_file is not None or cluster_file is not None:
+                board.reset(seed)
+        if network is not None:
+            board.network = parse_network(network, board.length, board.width, seed)
+    except ValueError as err:
+        print(err)
+        usage()
+        sys.exit(2)
+
+    start = time.perf_counter()
+    run(board, round_nbr, output_dir, snapshot_step, run_format, snapshot_codec)
+    print("%d rounds simulated in %.3f s, %d deceased" % (round_nbr, time.perf_counter() - start,
+                                                          board.deceased_nbr))
+
+    if checkpoint_file is not None:
+        board.save_checkpoint(checkpoint_file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+import BatchedBoard
+from DiseaseBoard import STATE, load_checkpoint
+
+REPLICA_NBR = 4
+
+
+def make_batch() -> BatchedBoard.BatchedBoard:
+    batch = BatchedBoard.BatchedBoard(REPLICA_NBR, (20, 30), 3, seed=5)
+    batch.contagion_rate = 0.3
+    batch.mortality_rate = 0.2
+    return batch
+
+
+def run(batch: BatchedBoard.BatchedBoard, round_nbr: int) -> BatchedBoard.BatchedBoard:
+    for _ in range(round_nbr):
+        batch.next_round()
+    return batch
+
+
+def assert_same_run(batch: BatchedBoard.BatchedBoard, expected: BatchedBoard.BatchedBoard) -> None:
+    assert batch.replica_nbr == expected.replica_nbr
+    assert batch.current_round == expected.current_round
+    assert (batch.last_board() == expected.last_board()).all()
+    assert (batch.counters == expected.counters).all()
+
+
+def test_replicas_differ():
+    batch = run(make_batch(), 20)
+    assert batch.last_board().shape == (REPLICA_NBR, 20, 30)
+    assert batch.counters.shape == (REPLICA_NBR, 21, len(STATE))
+    assert not (batch.last_board() == batch.last_board()[0]).all()
+
+
+def test_counters_match_boards():
+    batch = run(make_batch(), 20)
+    for replica in range(REPLICA_NBR):
+        states = np.bincount(batch.last_board()[replica].ravel(), minlength=len(STATE))
+        # Les personnes immunisées dès le tour 0 ne sont pas comptées
+        for state in ("INFECTED", "QUARANTINE", "DECEASED", "HOSPITALIZED"):
+            assert batch.counters[replica, -1, STATE[state]] == states[STATE[state]]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_checkpoint_resume(compress, tmp_path):
+    expected = run(make_batch(), 25)
+
+    file = str(tmp_path / "checkpoint.npz")
+    run(make_batch(), 10).save_checkpoint(file, compress)
+    resumed = BatchedBoard.load_checkpoint(file)
+    assert (resumed.counters[:, :11] == expected.counters[:, :11]).all()
+
+    assert_same_run(run(resumed, 15), expected)
+    with pytest.raises(ValueError):
+        load_checkpoint(file)
+
+
+def test_fork():
+    trunk = run(make_batch(), 10)
+    branch = trunk.fork()
+    assert_same_run(run(branch, 15), run(trunk, 15))
+
+
+def test_engine():
+    with pytest.raises(ValueError):
+        make_batch().engine = "frontier"
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from BoardCodec import CODECS, decode_board, encode_board, load_board, save_board
+
+
+def random_board(shape, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 6, size=shape, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("shape", [(0, 0), (1, 1), (7, 13), (64, 64), (3, 9, 11)])
+def test_round_trip(codec, shape):
+    board = random_board(shape)
+    decoded = decode_board(encode_board(board, codec))
+
+    assert decoded.dtype == np.uint8
+    assert decoded.shape == board.shape
+    assert (decoded == board).all()
+    decoded[...] = 0
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_uniform_board(codec):
+    board = np.full((100, 100), 2, dtype=np.uint8)
+    board[40:60, 40:60] = 4
+    assert (decode_board(encode_board(board, codec)) == board).all()
+
+
+def test_save_load(tmp_path):
+    board = random_board((20, 30))
+    file = str(tmp_path / "board.bin")
+    save_board(file, board)
+    assert (load_board(file) == board).all()
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        encode_board(random_board((4, 4)), "gzip")
+    with pytest.raises(ValueError):
+        decode_board(b"NOPE" + bytes(16))
@@ -0,0 +1,101 @@
+import pickle
+
+import pytest
+
+from BoardCodec import CODECS
+from BoardHistory import BoardHistory, DeltaHistory, FrameHistory, LatestHistory
+from DiseaseBoard import DiseaseBoard
+
+ROUND_NBR = 25
+
+
+def boards_of_run(history: BoardHistory):
+    """
+    :param history: round history of the run
+    :return: board of the run, and a copy of its board at every round
+    """
+    board = DiseaseBoard(30, 3, "frontier", history, seed=3)
+    board.contagion_rate = 0.3
+    boards = [board.board_copy()]
+    for _ in range(ROUND_NBR):
+        board.next_round()
+        boards.append(board.board_copy())
+    return board, boards
+
+
+def test_board_history_is_abstract():
+    with pytest.raises(TypeError):
+        BoardHistory()
+
+
+@pytest.mark.parametrize("codec", (None,) + CODECS)
+def test_frame_history(codec):
+    board, boards = boards_of_run(FrameHistory(step=2, codec=codec))
+
+    assert board.history.rounds == list(range(0, ROUND_NBR + 1, 2))
+    for round_nbr in board.history.rounds:
+        assert (board.history.board_at(round_nbr) == boards[round_nbr]).all()
+    with pytest.raises(KeyError):
+        board.history.board_at(1)
+
+
+def test_frame_history_max_size():
+    board, boards = boards_of_run(FrameHistory(max_size=3))
+
+    assert board.history.rounds == [ROUND_NBR - 2, ROUND_NBR - 1, ROUND_NBR]
+    assert (board.history.board_at(ROUND_NBR - 2) == boards[ROUND_NBR - 2]).all()
+
+
+def test_frame_history_returns_copies():
+    board, boards = boards_of_run(FrameHistory())
+    board.history.board_at(3)[:] = 0
+    assert (board.history.board_at(3) == boards[3]).all()
+
+
+def test_latest_history():
+    board, boards = boards_of_run(LatestHistory())
+
+    assert board.history.rounds == [ROUND_NBR]
+    assert board.history.nbytes == 0
+    assert (board.history.board_at(ROUND_NBR) == boards[-1]).all()
+    assert board.history.board_at(ROUND_NBR) is not board.last_board()
+    with pytest.raises(KeyError):
+        board.history.board_at(ROUND_NBR - 1)
+
+
+@pytest.mark.parametrize("keyframe_interval", [-1, 1, 7])
+@pytest.mark.parametrize("codec", (None,) + CODECS)
+def test_delta_history(keyframe_interval, codec):
+    board, boards = boards_of_run(DeltaHistory(keyframe_interval, codec))
+
+    assert board.history.rounds == list(range(ROUND_NBR + 1))
+    for round_nbr in list(range(ROUND_NBR, -1, -1)) + list(range(ROUND_NBR + 1)):
+        assert (board.history.board_at(round_nbr) == boards[round_nbr]).all()
+
+
+def test_delta_history_changes():
+    board, boards = boards_of_run(DeltaHistory())
+
+    index, states = board.history.changes_at(ROUND_NBR)
+    previous = boards[ROUND_NBR - 1].ravel().copy()
+    previous[index] = states
+    assert (previous == boards[ROUND_NBR].ravel()).all()
+
+
+@pytest.mark.parametrize("history", [FrameHistory(), FrameHistory(codec="bitplanes"), LatestHistory(),
+                                     DeltaHistory(5), DeltaHistory(5, "rle")])
+def test_history_pickle(history):
+    board, boards = boards_of_run(history)
+    history = pickle.loads(pickle.dumps(board.history))
+
+    assert history.rounds == board.history.rounds
+    for round_nbr in history.rounds:
+        assert (history.board_at(round_nbr) == boards[round_nbr]).all()
+
+
+# Les plages de rle ne sont plus petites que sur des régions uniformes, pas sur un plateau aux immunités aléatoires
+@pytest.mark.parametrize("codec", ["bitplanes", "zlib"])
+def test_encoded_frames_are_smaller(codec):
+    board, _ = boards_of_run(FrameHistory(codec=codec))
+    raw, _ = boards_of_run(FrameHistory())
+    assert board.history.nbytes < raw.history.nbytes
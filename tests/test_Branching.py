@@ -0,0 +1,16 @@
+from Branching import run_scenarios
+from DiseaseBoard import configured_board
+
+
+def test_scenarios_match_uninterrupted_runs():
+    parameters = {"contagion_rate": 0.3, "contagion_delay": 10}
+    branches = {"same": {}, "distancing": {"contagion_rate": 0.05}}
+    results = run_scenarios(30, 3, 10, 20, branches, parameters, seed=4, processes=1)
+
+    board = configured_board(30, 3, parameters, "frontier", None, 4)
+    for _ in range(30):
+        board.next_round()
+    assert (results["same"] == board.counters).all()
+
+    assert (results["distancing"][:11] == board.counters[:11]).all()
+    assert (results["distancing"] != board.counters).any()
@@ -0,0 +1,54 @@
+import numpy as np
+
+from ContactNetwork import geometric_network, grid_network, small_world_network
+from DiseaseBoard import DiseaseBoard, load_checkpoint
+
+
+def make_board(engine: str) -> DiseaseBoard:
+    board = DiseaseBoard((30, 40), 3, engine, seed=2)
+    board.contagion_rate = 0.3
+    board.contagion_delay = 10
+    return board
+
+
+def test_grid_network():
+    network = grid_network(3, 4)
+    contacts, _ = network.contacts(np.array([0, 5]))
+
+    assert network.node_nbr == 12
+    assert network.edge_nbr == 2 * (3 * 3 + 2 * 4 + 2 * 2 * 3)
+    assert sorted(contacts[:3].tolist()) == [1, 4, 5]
+    assert sorted(contacts[3:].tolist()) == [0, 1, 2, 4, 6, 8, 9, 10]
+
+
+def test_random_networks_are_symmetric():
+    rng = np.random.default_rng(1)
+    for network in (small_world_network(10, 12, 0.2, rng), geometric_network(10, 12, 1.8, rng)):
+        nodes = np.arange(network.node_nbr)
+        contacts, _ = network.contacts(nodes)
+        sources = np.repeat(nodes, np.diff(network.indptr))
+        edges = set(zip(sources.tolist(), contacts.tolist()))
+        assert all((target, source) in edges for source, target in edges)
+        assert (sources != contacts).all()
+
+
+def test_grid_network_matches_frontier():
+    network_board, frontier_board = make_board("network"), make_board("frontier")
+    for _ in range(40):
+        network_board.next_round()
+        frontier_board.next_round()
+
+    assert (network_board.last_board() == frontier_board.last_board()).all()
+    assert (network_board.counters == frontier_board.counters).all()
+
+
+def test_default_grid_is_not_saved(tmp_path):
+    board = make_board("network")
+    for _ in range(10):
+        board.next_round()
+    file = str(tmp_path / "checkpoint.npz")
+    board.save_checkpoint(file)
+
+    with np.load(file) as arrays:
+        assert "network_indptr" not in arrays.files
+    assert load_checkpoint(file).network is None
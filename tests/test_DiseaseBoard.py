@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from BoardHistory import LatestHistory
+from DiseaseBoard import DiseaseBoard, ENGINES, load_checkpoint
+from Kernel import moore_kernel
+
+# Tirages indépendants comparés entre deux moteurs qui ne font pas les mêmes tirages aléatoires
+SEED_NBR = 30
+
+
+def make_board(engine: str, history=None) -> DiseaseBoard:
+    board = DiseaseBoard(40, 3, engine, history, seed=7)
+    board.contagion_rate = 0.3
+    board.contagion_delay = 10
+    board.quarantine_rate = 0.4
+    board.mortality_rate = 0.2
+    return board
+
+
+def run(board: DiseaseBoard, round_nbr: int) -> DiseaseBoard:
+    for _ in range(round_nbr):
+        board.next_round()
+    return board
+
+
+def assert_same_statistics(engine: str, expected_engine: str, **properties) -> None:
+    """
+    Check that two engines give the same mean final counters over SEED_NBR runs, within 4 standard errors
+
+    :param engine: engine to check
+    :param expected_engine: reference engine
+    :param properties: board properties set before the runs
+    """
+    counters = []
+    for name in (engine, expected_engine):
+        final_counters = []
+        for seed in range(SEED_NBR):
+            board = DiseaseBoard(30, 3, name, seed=seed)
+            board.contagion_rate = 0.2
+            board.contagion_delay = 8
+            board.quarantine_rate = 0.4
+            board.mortality_rate = 0.2
+            for key, value in properties.items():
+                setattr(board, key, value)
+            final_counters.append(run(board, 40).counters[-1])
+        counters.append(np.array(final_counters, dtype=float))
+
+    difference = counters[0].mean(axis=0) - counters[1].mean(axis=0)
+    standard_error = np.sqrt((counters[0].var(axis=0) + counters[1].var(axis=0)) / SEED_NBR)
+    assert (np.abs(difference) <= 4 * standard_error + 1).all()
+
+
+def assert_same_run(board: DiseaseBoard, expected: DiseaseBoard) -> None:
+    assert board.current_round == expected.current_round
+    assert (board.last_board() == expected.last_board()).all()
+    assert (board.counters == expected.counters).all()
+    assert (board._contamination_dates == expected._contamination_dates).all()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("compress", [False, True])
+def test_checkpoint_resume(engine, compress, tmp_path):
+    expected = run(make_board(engine), 30)
+
+    file = str(tmp_path / "checkpoint.npz")
+    run(make_board(engine), 12).save_checkpoint(file, compress)
+    resumed = run(load_checkpoint(file), 18)
+
+    assert_same_run(resumed, expected)
+    assert resumed.contagion_rate == expected.contagion_rate
+
+
+def test_numpy_engine_matches_loop():
+    assert_same_statistics("numpy", "loop")
+
+
+def test_frontier_engine_matches_numpy():
+    assert_same_run(run(make_board("frontier"), 40), run(make_board("numpy"), 40))
+
+
+def test_board_copy():
+    board = run(make_board("frontier"), 5)
+    copy = board.board_copy()
+    assert copy is not board.last_board()
+    assert (copy == board.last_board()).all()
+
+    run(board, 10)
+    assert (copy != board.last_board()).any()
+
+
+def test_board_at_current_round_is_a_copy():
+    board = run(make_board("frontier"), 5)
+    board.board_at(board.current_round)[:] = 0
+    assert board.last_board().any()
+
+
+def test_event_engine_matches_frontier():
+    assert_same_run(run(make_board("event"), 40), run(make_board("frontier"), 40))
+
+
+def test_event_engine_delay_change():
+    boards = [run(make_board(engine), 10) for engine in ("event", "frontier")]
+    for board in boards:
+        board.contagion_delay = 4
+        board.diagnosis_delay = 3
+    assert_same_run(run(boards[0], 30), run(boards[1], 30))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_fork(engine):
+    trunk = run(make_board(engine), 12)
+    branch = trunk.fork(LatestHistory())
+    run(trunk, 18)
+    run(branch, 18)
+
+    assert_same_run(branch, trunk)
+
+
+def test_fork_is_independent():
+    trunk = run(make_board("frontier"), 12)
+    board = trunk.board_copy()
+    branch = trunk.fork()
+    branch.contagion_rate = 0
+    run(branch, 10)
+
+    assert (trunk.last_board() == board).all()
+    assert trunk.current_round == 12
+
+
+@pytest.mark.parametrize("stripe_nbr", [1, 10])
+def test_stripes_engine_matches_numpy(stripe_nbr):
+    assert_same_statistics("stripes", "numpy", stripe_nbr=stripe_nbr)
+
+
+def test_stripes_engine_is_reproducible():
+    boards = []
+    for _ in range(2):
+        board = make_board("stripes")
+        board.stripe_nbr = 5
+        boards.append(run(board, 30))
+    assert_same_run(boards[0], boards[1])
+
+
+def test_moore_kernel_matches_default_contagion():
+    board = make_board("numpy")
+    board.kernel = moore_kernel(1)
+    assert_same_run(run(board, 30), run(make_board("numpy"), 30))
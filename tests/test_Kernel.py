@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from Kernel import (BOUNDARIES, BOUNDARY_PERIODIC, DIRECT_TAP_NBR, check_kernel, contamination_log_escape,
+                    gaussian_kernel, moore_kernel, neighbour_sum)
+
+
+def brute_force_sum(mask: np.ndarray, kernel: np.ndarray, boundary: str) -> np.ndarray:
+    """
+    :return: out[x, y] = sum(kernel[r + dx, r + dy] * mask[x + dx, y + dy]), cell by cell
+    """
+    radius = kernel.shape[0] // 2
+    length, width = mask.shape
+    total = np.zeros(mask.shape)
+    for x in range(length):
+        for y in range(width):
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    nx, ny = x + dx, y + dy
+                    if boundary == BOUNDARY_PERIODIC:
+                        nx, ny = nx % length, ny % width
+                    elif not (0 <= nx < length and 0 <= ny < width):
+                        continue
+                    total[x, y] += kernel[radius + dx, radius + dy] * mask[nx, ny]
+    return total
+
+
+# Noyaux appliqués par sommes décalées (peu de coefficients) et par FFT
+KERNELS = [moore_kernel(1), moore_kernel(2), gaussian_kernel(3, 1.5),
+           np.random.default_rng(0).random((5, 5)) * (np.random.default_rng(1).random((5, 5)) < 0.5)]
+
+
+def test_kernels_cover_both_paths():
+    tap_nbrs = [np.count_nonzero(kernel) for kernel in KERNELS]
+    assert min(tap_nbrs) <= DIRECT_TAP_NBR < max(tap_nbrs)
+
+
+@pytest.mark.parametrize("boundary", BOUNDARIES)
+@pytest.mark.parametrize("kernel_index", range(len(KERNELS)))
+def test_neighbour_sum(boundary, kernel_index):
+    kernel = KERNELS[kernel_index]
+    mask = np.random.default_rng(2).random((11, 14)) < 0.3
+
+    expected = brute_force_sum(mask, kernel, boundary)
+    assert np.allclose(neighbour_sum(mask, kernel, boundary), expected)
+
+    # Pile de plateaux : chacun est traité séparément
+    stack = np.stack((mask, ~mask))
+    sums = neighbour_sum(stack, kernel, boundary)
+    assert np.allclose(sums[0], expected)
+    assert np.allclose(sums[1], brute_force_sum(~mask, kernel, boundary))
+
+
+@pytest.mark.parametrize("boundary", BOUNDARIES)
+def test_contamination_log_escape(boundary):
+    kernel = gaussian_kernel(3, 2.0)
+    contagious = np.random.default_rng(3).random((12, 9)) < 0.2
+
+    expected = brute_force_sum(contagious, np.log1p(-0.4 * kernel), boundary)
+    assert np.allclose(contamination_log_escape(contagious, kernel, 0.4, boundary), expected)
+
+
+def test_check_kernel():
+    check_kernel(moore_kernel(2))
+    with pytest.raises(ValueError):
+        check_kernel(np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        check_kernel(-moore_kernel(1))
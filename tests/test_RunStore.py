@@ -0,0 +1,22 @@
+import pytest
+
+from BoardHistory import DeltaHistory
+from DiseaseBoard import DiseaseBoard
+from RunStore import RUN_FORMAT_DELTA, RUN_FORMAT_FRAMES, RunReader, RunWriter
+
+
+@pytest.mark.parametrize("board_format, step", [(RUN_FORMAT_DELTA, 1), (RUN_FORMAT_FRAMES, 1), (RUN_FORMAT_FRAMES, 3)])
+def test_board_at(board_format, step, tmp_path):
+    board = DiseaseBoard(40, 4, "frontier", DeltaHistory(keyframe_interval=-1), seed=3)
+    board.contagion_rate = 0.3
+    with RunWriter(str(tmp_path), board, board_format, step=step, keyframe_interval=7) as writer:
+        for _ in range(30):
+            board.next_round()
+            writer.write_round()
+
+    reader = RunReader(str(tmp_path))
+    assert reader.last_round == 30
+    assert (reader.counters == board.counters).all()
+    assert reader.parameters["contagion_rate"] == board.contagion_rate
+    for round_nbr in list(reader.rounds)[::-1] + list(reader.rounds):
+        assert (reader.board_at(round_nbr) == board.board_at(round_nbr)).all()
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from Seeding import load_cluster_cells, load_immunity_map, load_map, read_image, resample
+
+# Image 3x5 utilisée par les tests des formats netpbm
+PIXELS = np.array([[0, 1, 0, 0, 1],
+                   [1, 1, 0, 1, 0],
+                   [0, 0, 0, 0, 1]], dtype=np.uint8)
+
+
+def write_image(path, magic: bytes, pixels: np.ndarray, maxval: int = 1) -> str:
+    """
+    Write a netpbm image, with a comment in its header
+
+    :param path: image file path
+    :param magic: netpbm format, P1, P2, P4 or P5
+    :param pixels: (line, column) pixel values, black pixels as 1 for PBM images
+    :param maxval: maximum gray level of PGM images
+    :return: image file path
+    """
+    height, width = pixels.shape
+    header = magic + b"\n# comment\n%d %d\n" % (width, height)
+    if magic in (b"P2", b"P5"):
+        header += b"%d\n" % maxval
+    if magic in (b"P1", b"P2"):
+        raster = b"\n".join(b" ".join(b"%d" % value for value in row) for row in pixels) + b"\n"
+    elif magic == b"P4":
+        raster = np.packbits(pixels.astype(np.uint8), axis=1).tobytes()
+    else:
+        raster = pixels.astype(np.uint8 if maxval < 256 else ">u2").tobytes()
+    path.write_bytes(header + raster)
+    return str(path)
+
+
+@pytest.mark.parametrize("magic", [b"P1", b"P4"])
+def test_read_bitmap(tmp_path, magic):
+    image = read_image(write_image(tmp_path / "image.pbm", magic, PIXELS))
+    assert (image == PIXELS).all()
+
+
+@pytest.mark.parametrize("magic", [b"P2", b"P5"])
+@pytest.mark.parametrize("maxval", [255, 1000])
+def test_read_graymap(tmp_path, magic, maxval):
+    pixels = (PIXELS.astype(np.int64) * maxval * 3) // 4
+    image = read_image(write_image(tmp_path / "image.pgm", magic, pixels, maxval))
+    assert np.allclose(image, pixels / maxval)
+
+
+def test_read_wide_bitmap(tmp_path):
+    # Lignes de plus d'un octet, complétées jusqu'à un octet entier
+    pixels = np.random.default_rng(0).integers(0, 2, size=(7, 13), dtype=np.uint8)
+    assert (read_image(write_image(tmp_path / "image.pbm", b"P4", pixels)) == pixels).all()
+
+
+def test_read_errors(tmp_path):
+    path = tmp_path / "image.pgm"
+    path.write_bytes(b"GIF89a")
+    with pytest.raises(ValueError):
+        read_image(str(path))
+    path.write_bytes(b"P2\n3 2\n")
+    with pytest.raises(ValueError):
+        read_image(str(path))
+
+
+def test_load_map(tmp_path):
+    values = np.linspace(0, 1, 12).reshape(3, 4)
+    np.save(tmp_path / "map.npy", values)
+    np.savetxt(tmp_path / "map.csv", values, delimiter=",")
+
+    assert isinstance(load_map(str(tmp_path / "map.npy")), np.memmap)
+    assert (load_map(str(tmp_path / "map.npy")) == values).all()
+    assert np.allclose(load_map(str(tmp_path / "map.csv")), values)
+    assert (load_map(write_image(tmp_path / "map.pbm", b"P1", PIXELS)) == PIXELS).all()
+
+
+def test_resample():
+    values = np.arange(6).reshape(2, 3)
+    assert resample(values, (2, 3)) is values
+    assert (resample(values, (4, 6)) == np.repeat(np.repeat(values, 2, axis=0), 2, axis=1)).all()
+    assert (resample(np.repeat(values, 2, axis=0), (2, 3)) == values).all()
+
+
+def test_load_immunity_map(tmp_path):
+    values = np.linspace(0, 1, 12).reshape(3, 4)
+    np.save(tmp_path / "map.npy", values)
+
+    # Une carte flottante de la taille du plateau reste projetée en mémoire
+    immunity_map = load_immunity_map(str(tmp_path / "map.npy"), (3, 4))
+    assert isinstance(immunity_map, np.memmap)
+    assert immunity_map.dtype == np.float64
+
+    immunity_map = load_immunity_map(write_image(tmp_path / "map.pbm", b"P4", PIXELS), (6, 10))
+    assert immunity_map.shape == (6, 10)
+    assert (immunity_map[::2, ::2] == PIXELS).all()
+
+    np.save(tmp_path / "map.npy", np.ones((3, 4), dtype=np.uint8))
+    immunity_map = load_immunity_map(str(tmp_path / "map.npy"), (3, 4))
+    assert immunity_map.dtype == np.float32
+    assert (immunity_map == 1).all()
+
+
+def test_load_immunity_map_range(tmp_path):
+    np.save(tmp_path / "map.npy", np.full((3, 4), 1.5))
+    with pytest.raises(ValueError):
+        load_immunity_map(str(tmp_path / "map.npy"), (3, 4))
+
+
+def test_load_cluster_cells(tmp_path):
+    expected = np.array([[0, 1], [2, 3], [5, 0]])
+
+    (tmp_path / "clusters.csv").write_text("2,3\n0,1\n5,0\n2,3\n")
+    assert (load_cluster_cells(str(tmp_path / "clusters.csv"), (10, 10)) == expected).all()
+
+    np.save(tmp_path / "clusters.npy", np.array([[5, 0], [0, 1], [2, 3], [0, 1]], dtype=np.int32))
+    cells = load_cluster_cells(str(tmp_path / "clusters.npy"), (10, 10))
+    assert cells.dtype == np.int64
+    assert (cells == expected).all()
+
+    # Une seule cellule lue ne donne pas un tableau à une dimension
+    (tmp_path / "cluster.csv").write_text("4,7\n")
+    assert (load_cluster_cells(str(tmp_path / "cluster.csv"), (10, 10)) == [[4, 7]]).all()
+
+
+@pytest.mark.parametrize("magic,extension", [(b"P1", ".pbm"), (b"P5", ".pgm")])
+def test_load_cluster_cells_image(tmp_path, magic, extension):
+    pixels = PIXELS * (255 if magic == b"P5" else 1)
+    file = write_image(tmp_path / ("clusters" + extension), magic, pixels, 255)
+
+    # Les pixels de l'image sont étirés vers le plateau deux fois plus grand
+    cells = load_cluster_cells(file, (6, 10))
+    assert (cells == np.argwhere(PIXELS) * 2).all()
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import Sweep
+
+
+@pytest.fixture
+def simulated(monkeypatch):
+    """
+    :return: list of the replica tasks simulated by the sweeps, filled as they run
+    """
+    tasks = []
+
+    def map_replicas(replica_tasks, processes):
+        tasks.extend(replica_tasks)
+        return map_replicas.original(replica_tasks, processes)
+
+    map_replicas.original = Sweep.map_replicas
+    monkeypatch.setattr(Sweep, "map_replicas", map_replicas)
+    return tasks
+
+
+def run_sweep(rates, seed, cache_dir):
+    return Sweep.sweep({"contagion_rate": rates}, 2, 15, 20, 2, seed=seed, cache_dir=cache_dir, processes=1)
+
+
+def test_cache_hits(simulated, tmp_path):
+    cache_dir = str(tmp_path)
+    first = run_sweep([0.1, 0.3], 4, cache_dir)
+    assert len(simulated) == 4
+
+    second = run_sweep([0.3, 0.5], 4, cache_dir)
+    assert len(simulated) == 6
+    assert second[0][0] == first[1][0]
+    assert (second[0][1].counters == first[1][1].counters).all()
+
+
+def test_cache_key_depends_on_seed(simulated, tmp_path):
+    run_sweep([0.3], 4, str(tmp_path))
+    run_sweep([0.3], 5, str(tmp_path))
+    assert len(simulated) == 4
+
+
+def test_no_cache_without_seed(simulated, tmp_path):
+    run_sweep([0.3], None, str(tmp_path))
+    run_sweep([0.3], None, str(tmp_path))
+    assert len(simulated) == 4
+    assert os.listdir(str(tmp_path)) == []
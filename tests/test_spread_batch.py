@@ -0,0 +1,17 @@
+import pytest
+
+import spread_batch
+
+
+@pytest.mark.parametrize("options", [["-e", "frontier", "-n", "grid"], ["-n", "grid", "-e", "frontier"],
+                                     ["-l", "run.npz", "-i", "immunity.npy"], ["-x", "clusters.csv", "-l", "run.npz"]])
+def test_conflicting_options(options, tmp_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        spread_batch.main(options + ["-o", str(tmp_path), "5", "20", "2"])
+    assert exit_info.value.code == 2
+    assert "cannot be used with" in capsys.readouterr().out
+
+
+def test_network_option(tmp_path):
+    spread_batch.main(["-n", "grid", "-e", "network", "-o", str(tmp_path), "5", "20", "2"])
+    assert (tmp_path / "counters.csv").exists()